@@ -1,15 +1,31 @@
+import time
+_import_started = time.perf_counter()
+
 import json
 import os
-import time
 
+import checks
+import coop
+import delivery
+import governor
 import fasttravels
-from items import cmd_ap_get_def_from_pool, cmd_ap_give_weapon, cmd_ap_give_weapon_from_pool, cmd_ap_spawn_weapon, cmd_spawn_loot
-
-import items
+from lifecycle import Lifecycle, Phase
+import notifications
+import patches
+import paths
+import progression
+import pickups
 import quests
-from skills import cmd_ap_export_skills, cmd_ap_get_skills, cmd_ap_give_skillpoints, cmd_ap_random_skill, cmd_ap_reset_skilltree, cmd_ap_set_skill, cmd_ap_set_skillpoints, cmd_ap_take_skillpoints, cmd_ap_unlock_all_skills, cmd_ap_unlock_skilltree
+import reconcile
+import records
+import seeding
+import sessions
 import skills
-from unrealsdk import find_object, logging
+from stubs import command_stub
+import tasks
+from unrealsdk import logging
+from unrealsdk.hooks import Type #type:ignore
+import settings
 
 from mods_base import (
     ENGINE,
@@ -21,16 +37,38 @@ from mods_base import (
 from ui_utils import show_hud_message
 import vaultsymbols
 
-from .shared.bl2_data import get_bosses_only, get_regions_only, find_unlock_by_id
+# Imported on first use, mod discovery shouldn't pay for loading the shared data
+def bl2_data():
+    from .shared import bl2_data
+    return bl2_data
 
-SKILL_POINTS = find_object("AttributeInitializationDefinition", "GD_Globals.Skills.INI_SkillPointsPerLevelUp")
+# Only needed once the mod is enabled, see import_deferred. Their commands are registered
+# through stubs that import the module when first run.
+catalog = compaction = items = names = watchdog = warmcache = None
+
+def import_deferred():
+    global catalog, compaction, items, names, watchdog, warmcache
+    import catalog
+    import compaction
+    import items
+    import names
+    import watchdog
+    import warmcache
+
+    names.register("stations", fasttravels.station_entries)
+    names.register("skills", skills.skill_entries)
+    names.register("missions", quests.mission_entries)
 
 LocalModDir: str = os.path.dirname(os.path.realpath(__file__))
-_last_known_level = 0
-player_loaded = False
-config = False
-connected = False
-completed_checks = set()
+game_state = Lifecycle()
+session_manager = sessions.SessionManager()
+# Shortcuts into the active session for the hooks
+session: sessions.Session | None = None
+config: settings.Config | None = None
+mission_index: checks.LocationIndex | None = None
+kill_index: checks.KillIndex | None = None
+region_index: dict[str, records.Location] = {}
+unlocks: records.UnlockCache | None = None
 savefile_bindings_path = ""
 game_communication_path = ""
 seed = ""
@@ -39,11 +77,8 @@ def init():
     global game_communication_path
     global savefile_bindings_path
 
-    if "localappdata" in os.environ:
-        game_communication_path = os.path.expandvars(r"%localappdata%/BL2Archipelago")
-    else:
-        game_communication_path = os.path.expandvars(r"$HOME/BL2Archipelago")
-    
+    game_communication_path = paths.get_game_communication_path()
+
     if not os.path.exists(game_communication_path):
         logging.info(f"[Archipelago] Path {game_communication_path} does not exist. Please start the archipelago client first.")
         
@@ -52,24 +87,34 @@ def init():
         logging.info(f"[Archipelago] savefile_bindings.json not found. Please start the archipelago client first.")
         return
 
-    reset()
+    game_state.fall_back(Phase.MENU)
 
+@game_state.on_enter(Phase.MENU)
 def reset():
-    global player_loaded
+    global session
     global config
-    global connected
-    global completed_checks
 
-    player_loaded = False
-    config = False
-    connected = False
-    completed_checks = set()
+    # The session itself stays cached in session_manager for the next load of this save.
+    # Its pending checks are written first, while write_check can still find its seed path.
+    session_manager.deactivate(write_check)
+    session = None
+    config = None
+    tasks.runner.cancel_all()
+    compaction.compactor.reset()
+    # Undelivered grants aren't in the ledger yet, they are queued again on the next load
+    delivery.queue.clear()
+    checks.reset()
+    vaultsymbols.reset()
+    coop.router.reset()
+    # Skills differ per character, every resolver is rebuilt for the next load
+    names.reset()
+    progression.tracker.reset()
 
 def get_seed_path():
-    if not seed:
+    if session is None:
         return None
 
-    return os.path.join(game_communication_path, str(seed))
+    return session.seed_path
 
 def is_player_in_game():
     try:
@@ -91,209 +136,368 @@ def is_player_in_game():
     except (IndexError, AttributeError):
         return False
 
-def send_check(check_id, check_name):
-    if check_id in completed_checks:
-        return
-        
-    check_data = {
-        "type": "check",
-        "id": check_id,
-        "name": check_name,
-        "timestamp": time.time()
+# full_id -> the settings.CHECK_TYPES key enabling it
+check_types: dict[int, str] = {}
+
+def is_check_enabled(location) -> bool:
+    return config is None or check_types.get(location.full_id) in config.enabled_checks
+
+def send_check(location):
+    # On co-op clients this forwards to the host, which writes the check
+    coop.send_check(location)
+
+def write_check(event):
+    seed_path = get_seed_path()
+    if not seed_path:
+        return False
+
+    location = event.location
+    check_file = os.path.join(seed_path, f"check{location.full_id}.json")
+    try:
+        with open(check_file, 'w') as f:
+            f.write(event.payload())
+    except OSError:
+        logging.info(f"[Archipelago] Could not write file: {check_file}")
+        return False
+
+    logging.info(f"[Archipelago] Check {location.full_id} -> {location.check_name}")
+    return True
+
+def derive_location_tables():
+    data = bl2_data()
+    locations = data.get_all_locations()
+    return {
+        "missions": checks.locations_of_type(locations, "mission"),
+        "bosses": records.locations_by_name(data.get_bosses_only()),
+        "challenges": checks.locations_of_type(locations, "challenge"),
+        "pickups": checks.locations_of_type(locations, "pickup"),
+        "regions": records.locations_by_name(data.get_regions_only()),
     }
 
-    logging.info(f"[Archipelago] send_check seed path {get_seed_path()}")
-    
-    check_file = os.path.join(get_seed_path(), f"check{check_id}.json")
-    with open(check_file, 'w') as f:
-        json.dump(check_data, f)
-        
-    completed_checks.add(check_id)
-    logging.info(f"[Archipelago] Check {check_id} -> {check_name}")
+def build_indexes():
+    global mission_index
+    global kill_index
+    global region_index
+    global unlocks
+
+    tables = warmcache.load_or_build(derive_location_tables)
+    mission_index = checks.LocationIndex(tables["missions"], lambda mission: mission.MissionName)
+    logging.info(f"[Archipelago] Indexed {len(mission_index)} mission checks")
+
+    kill_index = checks.KillIndex(tables["bosses"])
+    logging.info(f"[Archipelago] Indexed {len(kill_index)} boss checks")
+
+    vaultsymbols.index = checks.LocationIndex(tables["challenges"], lambda challenge: challenge.ChallengeName)
+    logging.info(f"[Archipelago] Indexed {len(vaultsymbols.index)} challenge checks")
+
+    pickups.index = pickups.PickupIndex.from_locations(tables["pickups"])
+    logging.info(f"[Archipelago] Indexed {len(pickups.index)} pickup checks, {pickups.index.unresolved} not loaded yet")
+
+    region_index = tables["regions"]
+    coop.router.locations = {loc.full_id: loc for table in tables.values() for loc in table.values()}
+    check_types.update((loc.full_id, check_type) for check_type, table in tables.items() for loc in table.values())
+    coop.router.accepts = is_check_enabled
+    # checks.queue is a placeholder until activate_session swaps in the session's queue
+    coop.router.ready = lambda: session is not None
+    # Shared data is only imported once an item id is looked up for the first time
+    unlocks = records.UnlockCache(lambda item_id: bl2_data().find_unlock_by_id(item_id))
+
+    watchdog.watch("mission_index cache", lambda: mission_index.cache_size)
+    watchdog.watch("kill_index cache", lambda: kill_index.cache_size)
+    watchdog.watch("unlocks", lambda: len(unlocks))
+    watchdog.watch("sessions", lambda: len(session_manager))
 
 def on_enable():
     logging.info(f"[Archipelago] Hello!")
     show_hud_message("Archipelago", "Hello!")
+    import_deferred()
+    build_indexes()
     init()
 
 def on_disable():
     logging.info(f"[Archipelago] Bye bye!")
+    tasks.runner.cancel_all()
+    restored = patches.engine.undo()
+    progression.skill_point_override.reset()
+    logging.info(f"[Archipelago] Restored {restored} patched values")
     show_hud_message("Archipelago", "Bye bye!")
 
 ap_check_count=0
-ap_check_max=100
 
 @hook("WillowGame.WillowPlayerController:PlayerTick")
 def on_player_tick(caller, function, params, method) -> bool:
     global ap_check_count
 
-    if is_player_in_game() and connected and config:
+    if game_state.in_game:
         ap_check_count = ap_check_count + 1
 
-        if ap_check_count > ap_check_max:
-            # check_for_unlocks()
-            # on ap get skillpoint: GeneralSkillPoints + 1
-            # get_pc().PlayerReplicationInfo.GeneralSkillPoints = 0
-            ap_check_count=0
+    governor.governor.run_frame()
+    return True
 
-        return True
+def poll_config(budget):
+    global config
+    if session.config_watcher.poll():
+        config = session.config
+        apply_config()
 
-    return True
+def deliver_items(budget):
+    delivery.queue.drain(budget)
 
-def check_for_unlocks():
-    hud_message = ""
-    try:
-        for root, dirs, files in os.walk(get_seed_path()):
-            for file in files:
-                if file.startswith("AP"):
-                    json = convert_json_to_map(os.path.join(root, file))
-                    player = json["player"]
-                    item = find_unlock_by_id(json["item_id"])
-                    logging.info(f"[Archipelago] Player {player} sent {item["name"]}")
-                    hud_message += f"Player {player} sent {item["name"]}\n"
-                    handle_unlock(item)
+def poll_received_items(budget):
+    global ap_check_count
+    check_for_unlocks()
+    # on ap get skillpoint: GeneralSkillPoints + 1
+    # get_pc().PlayerReplicationInfo.GeneralSkillPoints = 0
+    ap_check_count = 0
+
+# Everything the tick does, in priority order. Shares are fractions of the frame budget,
+# tasks get whatever is left of it.
+governor.governor.register("checks", 0, 0.3, lambda budget: checks.queue.drain(write_check, budget), lambda: game_state.in_game and checks.queue.ready())
+governor.governor.register("deliveries", 1, 0.3, deliver_items, lambda: game_state.in_game and bool(delivery.queue))
+governor.governor.register("skill points", 2, 0.1, lambda budget: progression.tracker.flush(), lambda: game_state.in_game and progression.tracker.pending_points > 0)
+# Co-op clients reach IN_GAME without a session, they only forward checks
+governor.governor.register("config", 3, 0.1, poll_config, lambda: game_state.in_game and session is not None)
+governor.governor.register("received items", 4, 0.3, poll_received_items, lambda: game_state.in_game and session is not None and ap_check_count > config.poll_interval)
+governor.governor.register("notifications", 5, 0.1, lambda budget: notifications.flush(), lambda: bool(notifications.queue))
+governor.governor.register("compaction", 6, 0.1, lambda budget: compaction.compactor.poll(), lambda: game_state.in_game)
+governor.governor.register("watchdog", 7, 0.1, lambda budget: watchdog.watchdog.poll())
+governor.governor.register("tasks", 8, 1.0, tasks.runner.run, lambda: bool(tasks.runner))
 
-    except OSError:
-        # Directory access error, continue
-        pass
+def check_for_unlocks():
+    if session is None:
+        return
 
-    if hud_message:
-        show_hud_message("Archipelago", hud_message)
+    # Only items missing from this save's ledger are read and queued for delivery
+    waiting = len(delivery.queue)
+    # Queued and unhandled items are skipped before their files are read again
+    reconcile.reconcile(session.seed_path, session.ledger, queue_received_item, session.archive, is_received_item_waiting)
+    if len(delivery.queue) > waiting:
+        logging.info(f"[Archipelago] Queued {len(delivery.queue) - waiting} received items, {len(session.ledger)} applied so far")
+
+def is_received_item_waiting(key) -> bool:
+    return key in delivery.queue or key in session.unhandled
+
+def queue_received_item(key, json):
+    """Queue a received item for delivery. It only enters the ledger once applied, so this always returns False."""
+    player = json["player"]
+    item = unlocks.get(json["item_id"])
+    if item is None:
+        logging.info(f"[Archipelago] Unknown item id {json["item_id"]} in {key}")
+        return False
 
-def handle_unlock(item):
-    match item["name"]:
-        case "Weapon" | "Artifact" | "Classmod":
-            pass
-            # spawn_item()
+    if not can_handle_unlock(item):
+        # Left out of the ledger so it is delivered once there is a handler for it
+        logging.info(f"[Archipelago] No handler for {item.name} ({key}) yet, not applying it")
+        session.unhandled.add(key)
+        return False
 
-def convert_json_to_map(filepath):
-    jsonmap = {}
-    try:
-        with open(filepath, 'r') as f:
-            jsonmap = json.load(f)
-    except OSError:
-        logger.warning(f"Could not read file: {filepath}")
-    
-    return jsonmap
+    # Rewards are derived from the seed and the sending location, re-delivery yields the same item
+    rng = seeding.location_stream(f"{player}:{json.get("location_id", key)}", item.name)
+    priority = delivery.Priority.URGENT if item.name == "Skill Point" else delivery.Priority.NORMAL
+    delivery.push(key, item.name, lambda: apply_received_item(key, player, item, rng), priority)
+    return False
+
+def apply_received_item(key, player, item, rng):
+    if not handle_unlock(item, rng):
+        # Nothing changed in the game (e.g. every skill already unlocked), don't retry it this session
+        logging.info(f"[Archipelago] {item.name} from {player} could not be applied")
+        session.unhandled.add(key)
+        return
 
-@hook("WillowGame.WillowPlayerController:SpawningProcessComplete")
-def on_spawning_process_complete(obj, args, ret, HookedMethod):
-    logging.info(f"[Archipelago] {HookedMethod} has been hooked")
+    logging.info(f"[Archipelago] Player {player} sent {item.name}")
+    notifications.notify_received(player, item.name)
+    # Only persisted with the game's own save, see on_save_game
+    session.ledger.add(key)
 
-# @hook("WillowGame.WillowPlayerController:WillowClientDisableLoadingMovie")
-@hook("WillowGame.WillowPlayerController:SpawningProcessComplete")
-def on_loading_complete(caller, function, params, method):
+def can_handle_unlock(item) -> bool:
+    return item.name in ("Skill Point", "Skill", "Quest") or item.name in catalog.UNLOCK_POOLS or fasttravels.is_station(item.name)
 
-    disable_skillpoints_on_levelup()
+def handle_unlock(item, rng) -> bool:
+    """Apply an unlock to the player, returns True if it changed anything."""
+    match item.name:
+        case "Skill Point":
+            progression.tracker.queue_skill_points(1)
+            return True
+        case "Skill":
+            return skills.random_skill(rng)
+        case "Quest":
+            return quests.random_quest(rng)
+        case _ if item.name in catalog.UNLOCK_POOLS:
+            # The seeded stream picks the balance, so a re-delivery gives the same item
+            balance = catalog.pick(catalog.UNLOCK_POOLS[item.name], rng)
+            return balance is not None and items.give_balance(balance)
+        case _ if fasttravels.is_station(item.name):
+            return fasttravels.register_fasttravel(item.name)
+    # Artifact and Classmod have no pool yet
+    return False
+
+@hook("WillowGame.WillowPlayerController:WillowClientShowLoadingMovie")
+def on_loading_started(caller, function, params, method):
+    game_state.fall_back(Phase.LOADING)
+    return True
 
+@hook("WillowGame.WillowPlayerController:SpawningProcessComplete")
+def on_spawning_process_complete(caller, function, params, method):
+    game_state.advance(Phase.SPAWNED)
     return True
 
 @hook("WillowGame.WillowPlayerController:WillowClientDisableLoadingMovie")
 def on_loading_complete(caller, function, params, method):
+    game_state.advance(Phase.IN_GAME)
+    logging.info(f"[Archipelago] Lifecycle: {game_state.phase.name}")
+    return True
 
-    global player_loaded
-
-    player_loaded = True
-    logging.info(f"[Archipelago] Player Loaded: {player_loaded}")
-
-    if not connected:
-        connect_to_archipelago()
-
-    if not config:
-        load_config()
+@game_state.on_enter(Phase.LOADING)
+@game_state.on_enter(Phase.MENU)
+def forget_engine_objects():
+    # The caches are keyed by engine objects, a reused address must not hit a stale entry
+    for index in (mission_index, kill_index, vaultsymbols.index):
+        if index is not None:
+            index.clear_cache()
+    pickups.index.invalidate()
+
+@game_state.on_enter(Phase.IN_GAME)
+def refresh_pickup_index():
+    # Each map load can bring definitions that weren't loaded at the main menu
+    if pickups.index.unresolved and pickups.index.refresh():
+        logging.info(f"[Archipelago] Indexed {len(pickups.index)} pickup checks, {pickups.index.unresolved} not loaded yet")
+
+@game_state.on_enter(Phase.IN_GAME)
+def send_region_check():
+    # Clients have no config, the host filters what they forward
+    if config is not None and not config.check_regions:
+        return
 
     internal_name = ENGINE.GetCurrentWorldInfo().GetMapName()
     area_name = get_pc().GetWillowGlobals().GetLevelDependencyList().GetFriendlyLevelNameFromMapName(internal_name)
 
-    if area_name not in get_regions_only().keys():
-        return False
-
-    loc = get_regions_only()[area_name]
-
-    check_name = f"{loc["action"]} {loc["name"]}"
-
-    send_check(loc["full_id"], check_name)
+    loc = region_index.get(area_name)
+    if loc is None:
+        return
 
-    return True
+    send_check(loc)
 
 @hook("WillowGame.WillowPlayerController:LoadTheBank")
 def check_level_change(caller, function, params, method):
-    current_level = caller.PlayerReplicationInfo.ExpLevel
-    global _last_known_level
-    if current_level > _last_known_level:
-        logging.info(f"[Archipelago] Player Level Up: {_last_known_level} -> {current_level}")
-        _last_known_level = current_level
+    progression.tracker.observe_level(caller.PlayerReplicationInfo.ExpLevel)
+
+@hook("WillowGame.WillowSaveGameManager:SaveGame", Type.POST)
+def on_save_game(caller, function, params, method):
+    # The ledger must never claim more than the save holds, so it is written together with it
+    if session is not None:
+        session.ledger.save()
 
 @hook("WillowGame.WillowPlayerController:CompleteQuitToMenu")
 def on_disconnect(caller, function, params, method):
-    reset()
-    logging.info(f"[Archipelago] Player disconnected: {player_loaded}")
+    game_state.fall_back(Phase.MENU)
+    logging.info(f"[Archipelago] Player disconnected")
     return True
 
 @hook("WillowGame.WillowPlayerPawn:PickupInventory")
 def on_pickup_inventory(caller, function, params, method):
-    logging.info(f"[Archipelago] on_pickup_inventory: {params}")
-    if is_player_in_game():
-        # Example: Send check for picking up any item
-        # You'd want to filter this based on specific items
-        item_name = "Unknown Item"  # Extract actual item name from params
-        send_check(f"pickup_{item_name}", f"Picked up {item_name}")
+    if config and not config.check_pickups:
+        return True
+
+    check = pickups.index.match(params.ThePickup.Inventory)
+    if check is None:
+        return True
+
+    send_check(check)
     return True
 
 @hook("WillowGame.MissionTracker:SetMissionStatus")
 def on_mission_status_change(caller, function, params, method):
-    logging.info(f"[Archipelago] on_mission_status_change: {params}")
-    if is_player_in_game():
-        # Check if mission was completed
-        # params.NewStatus would indicate completion
-        mission_name = "Unknown Mission"  # Extract from params
-        send_check(f"mission_{mission_name}", f"Completed {mission_name}")
+    # Objective updates, turn-ins etc. all go through here, only completions are checks
+    if params.Status != checks.MS_COMPLETE:
+        return True
+
+    if config and not config.check_missions:
+        return True
+
+    check = mission_index.get(params.Mission)
+    if check is None:
+        return True
+
+    send_check(check)
     return True
 
 @hook("WillowGame.WillowPawn:Died")
 def on_enemy_died(caller, function, params, method):
-    # Check if it's a boss or important enemy
-    # Send boss defeat check
-    if caller.IsChampion() or caller.IsBoss():
-        *_, name = caller.GetTargetName("")
-
-        if name not in get_bosses_only().keys():
-            return False
-
-        loc = get_bosses_only()[name]
+    # Runs for every death in the game, ordinary enemies are rejected by the cached balance lookup
+    check = kill_index.get_for_pawn(caller)
+    if check is None:
+        return True
 
-        check_name = f"{loc["action"]} {loc["name"]}"
+    if config and not config.check_bosses:
+        return True
 
-        send_check(loc["full_id"], check_name)
-        
+    send_check(check)
     return True
 
+@game_state.on_enter(Phase.SPAWNED)
+def prune_patches():
+    # Patches on objects of the previous map went with it, their journal entries can't be undone
+    pruned = patches.engine.prune()
+    if pruned:
+        logging.info(f"[Archipelago] Forgot {pruned} patches on unloaded objects")
+
+@game_state.on_enter(Phase.SPAWNED)
 def disable_skillpoints_on_levelup():
-    logging.info(f"[Archipelago] Disabling vanilla skillpoints {SKILL_POINTS}!")
-    expression_list = SKILL_POINTS.ConditionalInitialization.ConditionalExpressionList
-    if expression_list:
-        expression = expression_list[0].Expressions
-        if expression:
-            expression[0].ConstantOperand2 = 999
+    progression.skill_point_override.ensure()
 
+@game_state.on_enter(Phase.SPAWNED)
+def detect_coop_role():
+    coop.detect_role()
+
+@game_state.on_enter(Phase.CONNECTED)
 def connect_to_archipelago():
-    global connected
+    global seed
+
+    # The host's save is bound to the seed, clients only forward checks to it
+    if not coop.router.is_host:
+        logging.info("[Archipelago] Co-op client, checks are forwarded to the host")
+        return True
+
+    seed = ""
+    save_id = get_savefile_id()
+    cached_seed = session_manager.find_seed(save_id)
+    if cached_seed is not None:
+        seed = cached_seed
+    elif not read_savefile_binding():
+        return False
+
+    if seed:
+        activate_session(save_id)
+    return True
+
+def activate_session(save_id):
+    global session
 
+    seeding.current_seed = seed
+    session = session_manager.activate(save_id, seed, os.path.join(game_communication_path, str(seed)))
+    checks.queue = session.check_queue
+    held = coop.router.flush()
+    if held:
+        logging.info(f"[Archipelago] Queued {held} checks sent before the session was active")
+    # Handlers may exist now that didn't last time, e.g. a station that wasn't loaded
+    session.unhandled.clear()
+    compaction.compactor.attach(session.seed_path, session.archive)
+
+def read_savefile_binding():
     savefile_bindings = []
     try:
         with open(savefile_bindings_path, 'r') as f:
             savefile_bindings = json.load(f)
     except OSError:
         logging.info(f"[Archipelago] Could not read file: {savefile_bindings_path}")
-        return
+        return False
 
     if not is_connected_to_seed(savefile_bindings):
         logging.info(f"[Archipelago] Savefile not connected to any seed. Connecting..")
         establish_new_connection(savefile_bindings)
 
     logging.info(f"[Archipelago] Savefile connected.")
-
-    connected = True
+    return True
 
 def is_connected_to_seed(savefile_bindings):
     global seed
@@ -343,37 +547,78 @@ def get_savefile_id():
     
     return save_game.SaveGameId
 
+@game_state.on_enter(Phase.CONFIGURED)
 def load_config():
     global config
 
-    config_path = os.path.join(get_seed_path(), "config.json")
-    try:
-        with open(config_path, 'r') as f:
-            config = json.load(f)
-    except OSError:
-        logging.info(f"[Archipelago] Could not read file: {config_path}")
+    if session is None:
+        return not coop.router.is_host
+
+    # Cached sessions keep their parsed config, the watcher picks up changes made meanwhile
+    if session.config is None and not session.config_watcher.load():
+        # Checks and received items must not wait for the file, poll_config swaps it in once it appears
+        logging.info("[Archipelago] Using the default config until config.json can be read")
+        config = settings.Config()
+    else:
+        config = session.config
+    apply_config()
+    return True
+
+def apply_config():
+    vaultsymbols.enabled = config.check_challenges
+    governor.governor.budget = config.frame_budget_us / 1e6
+
+# Registered after load_config so it runs once the seed and config are known
+@game_state.on_enter(Phase.CONFIGURED)
+def reconcile_save():
+    if session is None:
+        return
+    logging.info(f"[Archipelago] {len(session.ledger)} received items already applied to this save")
+    check_for_unlocks()
 
 build_mod(
-    coop_support=CoopSupport.Incompatible,
+    coop_support=CoopSupport.RequiresAllPlayers,
     on_enable=on_enable,
     on_disable=on_disable,
     commands=[
-        *items.commands,
+        command_stub("items", "cmd_spawn_loot", "spawn_loot", "Spawn loot from specified pools around a point with given parameters"),
+        command_stub("items", "cmd_ap_get_def_from_pool", "ap_get_def_from_pool", "Get DefinitionData (struct) for first item from pool"),
+        command_stub("items", "cmd_ap_roll_pool", "ap_roll_pool", "Roll a pool repeatedly for definitions and report the live inventory count before and after"),
+        command_stub("items", "cmd_ap_spawn_weapon", "ap_spawn_weapon", "Spawn a weapon drop at the player"),
+        command_stub("items", "cmd_ap_give_weapon", "ap_give_weapon", "Spawn a copy of your current weapon and add it to inventory"),
+        command_stub("items", "cmd_ap_give_weapon_from_pool", "ap_give_weapon_from_pool", "Spawn a weapon from a pool (e.g. legendary) and add it to inventory"),
         *skills.commands,
         *fasttravels.commands,
         *quests.commands,
+        *pickups.commands,
+        command_stub("extractor", "cmd_ap_extract_data", "ap_extract_data", "Extract fast travels, missions, skills, challenges and item pools to NDJSON"),
+        command_stub("catalog", "cmd_ap_build_catalog", "ap_build_catalog", "Flatten item pools into the persisted item catalog"),
+        command_stub("catalog", "cmd_ap_catalog_sample", "ap_catalog_sample", "Sample items from the item catalog and log the distribution"),
+        *tasks.commands,
+        command_stub("compaction", "cmd_ap_compact", "ap_compact", "Pack acknowledged check and item files of the current seed into its archive"),
+        command_stub("compaction", "cmd_ap_archive_lookup", "ap_archive_lookup", "Show an archived check or received item of the current seed"),
+        *delivery.commands,
+        command_stub("names", "cmd_ap_resolve", "ap_resolve", "Show ranked name matches for stations, skills or missions"),
+        *governor.commands,
+        command_stub("watchdog", "cmd_ap_watchdog", "ap_watchdog", "Snapshot mod memory and diff it against the baseline"),
+        *coop.commands,
     ],
     hooks=[
         on_player_tick,
+        on_loading_started,
+        on_spawning_process_complete,
         on_loading_complete,
         check_level_change,
         on_disconnect,
+        on_save_game,
         on_pickup_inventory,
         on_mission_status_change,
         on_enemy_died,
-        on_spawning_process_complete,
         *fasttravels.hooks,
         *vaultsymbols.hooks,
         *quests.hooks,
-    ]
-)
\ No newline at end of file
+    ],
+    network_functions=coop.network_functions,
+)
+
+logging.info(f"[Archipelago] Mod imported in {(time.perf_counter() - _import_started) * 1000:.2f} ms")
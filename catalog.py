@@ -0,0 +1,254 @@
+from argparse import Namespace
+from collections import Counter
+import json
+import os
+import random
+import time
+from mods_base import command
+from unrealsdk import find_object, logging
+
+import paths
+import seeding
+
+# 2 dropped the game stage from the key, the weights never depended on it
+FORMAT_VERSION = 2
+CATALOG_FILE = "item_catalog.json"
+DEFAULT_POOL = "GD_Itempools.WeaponPools.Pool_Weapons_All_06_Legendary"
+# AP item name -> pool its reward is picked from
+UNLOCK_POOLS = {
+    "Weapon": DEFAULT_POOL,
+}
+
+class AliasTable:
+    """Walker/Vose alias table: O(n) to build, O(1) per sample."""
+    __slots__ = ("items", "weights", "_prob", "_alias")
+
+    def __init__(self, items: list, weights: list[float]):
+        if not items or len(items) != len(weights):
+            raise ValueError("items and weights must be non-empty and the same length")
+
+        n = len(items)
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError("weights must sum to a positive value")
+
+        self.items = items
+        self.weights = weights
+        self._prob = [0.0] * n
+        self._alias = [0] * n
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+
+        # Leftovers are 1.0 up to float error
+        for i in large + small:
+            self._prob[i] = 1.0
+
+    def __len__(self):
+        return len(self.items)
+
+    def sample(self, rng: random.Random = random):
+        i = int(rng.random() * len(self.items))
+        return self.items[i] if rng.random() < self._prob[i] else self.items[self._alias[i]]
+
+def _probability(data) -> float:
+    # AttributeInitializationData. Only the constant part is read: Weight_* InitializationDefinitions
+    # and BaseValueAttributes (luck, game stage) are not evaluated, so the weights are approximate.
+    return max(0.0, data.BaseValueConstant * data.BaseValueScaleConstant)
+
+def flatten_pool(pool, weight: float = 1.0, out: dict | None = None, seen: frozenset = frozenset()) -> dict[str, float]:
+    """Collapse an ItemPoolDefinition and all nested pools into balance path -> probability."""
+    out = {} if out is None else out
+    if pool is None or pool in seen:
+        return out
+    seen = seen | {pool}
+
+    entries = [(b, _probability(b.Probability)) for b in pool.BalancedItems]
+    total = sum(p for _, p in entries)
+    if total <= 0:
+        return out
+
+    for entry, p in entries:
+        share = weight * p / total
+        if not share:
+            continue
+        if entry.ItmPoolDefinition:
+            flatten_pool(entry.ItmPoolDefinition, share, out, seen)
+        elif entry.InvBalanceDefinition:
+            path = entry.InvBalanceDefinition._path_name()
+            out[path] = out.get(path, 0.0) + share
+
+    return out
+
+class ItemCatalog:
+    """Precomputed pool path -> weighted balance table, persisted as JSON.
+
+    Weights are the pools' constant probabilities (see _probability), an approximation of the
+    in-game drop rates that does not vary with game stage. Alias tables are built lazily the
+    first time a table is sampled.
+    """
+    __slots__ = ("_weights", "_tables")
+
+    def __init__(self, weights: dict[str, dict[str, float]] | None = None):
+        self._weights = weights or {}
+        self._tables: dict[str, AliasTable] = {}
+
+    def __len__(self):
+        return len(self._weights)
+
+    def __contains__(self, key):
+        return key in self._weights
+
+    def add_pool(self, pool_path: str) -> bool:
+        pool = find_object("ItemPoolDefinition", pool_path)
+        if not pool:
+            logging.info(f"[Archipelago] Could not find item pool: {pool_path}")
+            return False
+
+        weights = flatten_pool(pool)
+        if not weights:
+            logging.info(f"[Archipelago] Item pool {pool_path} has no balanced items")
+            return False
+
+        self._weights[pool_path] = weights
+        self._tables.pop(pool_path, None)
+        return True
+
+    def distribution(self, pool_path: str) -> dict[str, float]:
+        return dict(self._weights.get(pool_path, {}))
+
+    def table(self, pool_path: str) -> AliasTable | None:
+        table = self._tables.get(pool_path)
+        if table is None:
+            weights = self._weights.get(pool_path)
+            if not weights:
+                return None
+            # Sorted, so a table built right after flattening and one loaded from disk (saved with
+            # sort_keys) give the same picks for the same seeded stream
+            ordered = sorted(weights.items())
+            table = AliasTable([path for path, _ in ordered], [weight for _, weight in ordered])
+            self._tables[pool_path] = table
+        return table
+
+    def sample(self, pool_path: str, rng: random.Random = random) -> str | None:
+        """Pick a balance definition path from the pool without touching the engine."""
+        table = self.table(pool_path)
+        return table.sample(rng) if table else None
+
+    def save(self, path: str):
+        data = {
+            "version": FORMAT_VERSION,
+            "pools": [
+                {"pool": pool, "items": weights}
+                for pool, weights in sorted(self._weights.items())
+            ],
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ItemCatalog":
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except OSError:
+            return cls()
+        except ValueError as e:
+            logging.info(f"[Archipelago] Could not parse {path}: {e}")
+            return cls()
+
+        if data.get("version") != FORMAT_VERSION:
+            logging.info(f"[Archipelago] Ignoring item catalog with version {data.get('version')}")
+            return cls()
+
+        return cls({entry["pool"]: entry["items"] for entry in data["pools"]})
+
+_catalog: ItemCatalog | None = None
+
+def get_catalog_path() -> str:
+    return os.path.join(paths.get_game_communication_path(), CATALOG_FILE)
+
+def get_catalog() -> ItemCatalog:
+    global _catalog
+    if _catalog is None:
+        _catalog = ItemCatalog.load(get_catalog_path())
+    return _catalog
+
+def pick(pool_path: str, rng: random.Random) -> str | None:
+    """Balance path of one reward from the pool, adding the pool to the catalog on first use."""
+    catalog = get_catalog()
+    if pool_path not in catalog and catalog.add_pool(pool_path):
+        try:
+            catalog.save(get_catalog_path())
+        except OSError as e:
+            logging.info(f"[Archipelago] Could not write item catalog: {e}")
+    return catalog.sample(pool_path, rng)
+
+def replay_mismatches(catalog: ItemCatalog, pool_path: str, seed: int, count: int) -> int:
+    """Picks that differ between the catalog in memory and the same catalog after a save/load round trip.
+
+    A received item is picked again on replay, possibly from the catalog on disk, so this must be 0.
+    """
+    reloaded = ItemCatalog({pool_path: json.loads(json.dumps(catalog.distribution(pool_path), sort_keys=True))})
+    fresh = ItemCatalog({pool_path: catalog.distribution(pool_path)})
+    first, second = random.Random(seed), random.Random(seed)
+    return sum(fresh.sample(pool_path, first) != reloaded.sample(pool_path, second) for _ in range(count))
+
+@command("ap_build_catalog", description="Flatten item pools into the persisted item catalog")
+def cmd_ap_build_catalog(args: Namespace) -> None:
+    catalog = get_catalog()
+    start = time.perf_counter()
+    built = 0
+    for pool_path in args.pools or (DEFAULT_POOL,):
+        if catalog.add_pool(pool_path):
+            built += 1
+
+    try:
+        catalog.save(get_catalog_path())
+    except OSError as e:
+        logging.error(f"[Archipelago] Could not write item catalog: {e}")
+        return
+
+    logging.info(f"[Archipelago] Built {built} catalog tables in {(time.perf_counter() - start) * 1000:.1f} ms, {len(catalog)} total")
+cmd_ap_build_catalog.add_argument("pools", help="ItemPoolDefinition paths, the legendary weapon pool if omitted", type=str, nargs="*")
+
+@command("ap_catalog_sample", description="Sample items from the item catalog and log the distribution")
+def cmd_ap_catalog_sample(args: Namespace) -> None:
+    catalog = get_catalog()
+    if args.pool not in catalog:
+        logging.info(f"[Archipelago] {args.pool} is not in the catalog, run ap_build_catalog first")
+        return
+
+    rng = seeding.get_rng(args.location, "item") if args.location is not None else random.Random(args.seed)
+    start = time.perf_counter()
+    counts = Counter(catalog.sample(args.pool, rng) for _ in range(args.count))
+    elapsed = time.perf_counter() - start
+
+    for path, count in counts.most_common(10):
+        logging.info(f"[Archipelago] {count:>6} {path}")
+    logging.info(f"[Archipelago] {args.count} samples in {elapsed * 1000:.2f} ms ({elapsed / args.count * 1e6:.2f} us each)")
+
+    if args.verify:
+        mismatches = replay_mismatches(catalog, args.pool, args.seed, args.count)
+        logging.info(f"[Archipelago] {mismatches} of {args.count} picks differ after a save/load round trip")
+cmd_ap_catalog_sample.add_argument("pool", help="ItemPoolDefinition path", type=str, nargs="?", default=DEFAULT_POOL)
+cmd_ap_catalog_sample.add_argument("--count", help="Number of samples", type=int, default=1000)
+cmd_ap_catalog_sample.add_argument("--seed", help="RNG seed", type=int, default=0)
+cmd_ap_catalog_sample.add_argument("--location", help="Location id to derive the samples from the AP seed", type=int, default=None)
+cmd_ap_catalog_sample.add_argument("--verify", help="Check that a reloaded catalog gives the same picks", action="store_true")
+
+commands = [
+    cmd_ap_build_catalog,
+    cmd_ap_catalog_sample,
+]
@@ -0,0 +1,156 @@
+import time
+from typing import Any, Callable, Iterable
+
+from records import CheckEvent, Location, locations_by_name
+
+# EMissionStatus
+MS_COMPLETE = 4
+
+_MISSING = object()
+
+# Seconds to wait before retrying after a failed write, doubled per consecutive failure
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30.0
+
+def locations_of_type(locations, location_type: str) -> dict[str, Location]:
+    """Filter shared data locations by their type and key them by name.
+
+    Accepts both the list and the name -> location dict shape returned by the loader.
+    """
+    return {name: loc for name, loc in locations_by_name(locations).items() if loc.type == location_type}
+
+class LocationIndex:
+    """Maps engine definition objects to Location records.
+
+    The name -> check table is built once from shared data. Engine objects are resolved
+    against it the first time they are seen and cached, misses included, so repeat
+    lookups for the same definition are a single dict probe. The cache is keyed by engine
+    objects and must be cleared whenever they may be unloaded (map loads, quitting).
+    """
+    __slots__ = ("_by_name", "_by_object", "_name_of")
+
+    def __init__(self, locations: dict[str, Location], name_of: Callable[[Any], str]):
+        self._by_name = dict(locations)
+        self._by_object: dict = {}
+        self._name_of = name_of
+
+    def __len__(self):
+        return len(self._by_name)
+
+    @property
+    def cache_size(self) -> int:
+        return len(self._by_object)
+
+    def clear_cache(self):
+        self._by_object.clear()
+
+    def get(self, obj) -> Location | None:
+        check = self._by_object.get(obj, _MISSING)
+        if check is _MISSING:
+            try:
+                check = self._by_name.get(self._name_of(obj))
+            except AttributeError:
+                check = None
+            self._by_object[obj] = check
+        return check
+
+    def get_by_name(self, name: str) -> Location | None:
+        return self._by_name.get(name)
+
+class KillIndex(LocationIndex):
+    """LocationIndex for enemy kills, keyed by the pawn's AIPawnBalanceDefinition.
+
+    The first death of an enemy type pays for IsChampion/IsBoss/GetTargetName; every
+    later death of that type is one dict probe and an identity check.
+    """
+    __slots__ = ()
+
+    def __init__(self, locations: dict[str, Location]):
+        super().__init__(locations, None)
+
+    def get_for_pawn(self, pawn) -> Location | None:
+        try:
+            balance = pawn.BalanceDefinitionState.BalanceDefinition
+        except AttributeError:
+            # Player pawns have no balance definition
+            return None
+
+        check = self._by_object.get(balance, _MISSING)
+        if check is None:
+            return None
+
+        if check is _MISSING:
+            check = None
+            if pawn.IsChampion() or pawn.IsBoss():
+                *_, name = pawn.GetTargetName("")
+                check = self._by_name.get(name)
+            self._by_object[balance] = check
+
+        return check
+
+class CheckQueue:
+    """Deduplicating queue of checks waiting to be written for the client.
+
+    push() is cheap enough to call from hooks; drain() does the file I/O and is
+    run from PlayerTick once a seed is connected. After a failed write, drain() backs
+    off until ready() so a missing seed directory isn't retried every frame.
+    """
+    __slots__ = ("completed", "_pending", "_failures", "_retry_at")
+
+    def __init__(self, completed: Iterable = ()):
+        self.completed = set(completed)
+        self._pending: dict = {}
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, check_id):
+        return check_id in self.completed or check_id in self._pending
+
+    def ready(self, now: float | None = None) -> bool:
+        """True if there are checks to write and no retry delay is running."""
+        if not self._pending:
+            return False
+        return (time.monotonic() if now is None else now) >= self._retry_at
+
+    def push(self, location: Location) -> bool:
+        check_id = location.full_id
+        if check_id in self.completed or check_id in self._pending:
+            return False
+        self._pending[check_id] = CheckEvent.now(location)
+        return True
+
+    def drain(self, write: Callable[[CheckEvent], bool], budget: float | None = None) -> int:
+        """Write pending checks in order. Stops at the first failed write so it is retried next time.
+
+        With a budget in seconds, stops once it is spent and leaves the rest for the next drain.
+        """
+        if not self.ready():
+            return 0
+
+        deadline = None if budget is None else time.perf_counter() + budget
+        written = 0
+        while self._pending:
+            if deadline is not None and written and time.perf_counter() >= deadline:
+                break
+            check_id, event = next(iter(self._pending.items()))
+            if not write(event):
+                self._failures += 1
+                self._retry_at = time.monotonic() + min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** min(self._failures - 1, 16))
+                break
+            self._failures = 0
+            del self._pending[check_id]
+            self.completed.add(check_id)
+            written += 1
+        return written
+
+queue = CheckQueue()
+
+def send_check(location: Location) -> bool:
+    return queue.push(location)
+
+def reset():
+    global queue
+    queue = CheckQueue()
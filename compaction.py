@@ -0,0 +1,234 @@
+from argparse import Namespace
+import glob
+import json
+import os
+import time
+from typing import Iterator
+from mods_base import command
+from unrealsdk import logging
+
+import reconcile
+import tasks
+
+ARCHIVE_FILE = "archive.ndjson"
+INDEX_FILE = "archive_index.ndjson"
+# Written by the client, a JSON list of the check ids it has read and sent. Kept outside the
+# check<id>.json pattern so check file scanners don't take it for a check. No client writes it
+# yet; until one does, only received item files are packed and check files stay as they are.
+CHECK_ACK_FILE = "ack_checks.json"
+# Seconds between automatic compaction passes
+COMPACT_INTERVAL = 10 * 60
+# Files packed per archive write, the originals of a batch are removed once its index lines are written
+BATCH_SIZE = 32
+
+class SeedArchive:
+    """Packed check and received item files of one seed.
+
+    Records are appended to archive.ndjson, one JSON object per line. archive_index.ndjson
+    gets one [entry, offset, length] line per record, where entry is "kind:id", so single
+    ids can be read back without scanning and a batch only ever appends to both files.
+    Index lines pointing past the end of the archive (an interrupted pass) are ignored on
+    open, and bytes past the last indexed record are dropped.
+    """
+    __slots__ = ("path", "index_path", "_index")
+
+    def __init__(self, seed_path: str):
+        self.path = os.path.join(seed_path, ARCHIVE_FILE)
+        self.index_path = os.path.join(seed_path, INDEX_FILE)
+        self._index: dict[str, tuple[int, int]] = {}
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, kind_and_id: tuple[str, str]):
+        return _entry(*kind_and_id) in self._index
+
+    @classmethod
+    def open(cls, seed_path: str) -> "SeedArchive":
+        archive = cls(seed_path)
+        try:
+            size = os.path.getsize(archive.path)
+        except OSError:
+            size = 0
+
+        try:
+            with open(archive.index_path, 'r') as f:
+                for line in f:
+                    try:
+                        entry, offset, length = json.loads(line)
+                    except ValueError:
+                        # A torn last line from an interrupted pass
+                        continue
+                    if offset + length <= size:
+                        archive._index[entry] = (offset, length)
+        except OSError:
+            pass
+
+        end = max((offset + length for offset, length in archive._index.values()), default=0)
+        if size > end:
+            try:
+                os.truncate(archive.path, end)
+            except OSError:
+                pass
+        return archive
+
+    def ids(self, kind: str) -> list[str]:
+        prefix = f"{kind}:"
+        return [entry[len(prefix):] for entry in self._index if entry.startswith(prefix)]
+
+    def get(self, kind: str, record_id: str) -> dict | None:
+        span = self._index.get(_entry(kind, record_id))
+        if span is None:
+            return None
+        offset, length = span
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                return json.loads(f.read(length))["data"]
+        except (OSError, ValueError, KeyError) as e:
+            logging.info(f"[Archipelago] Could not read {kind} {record_id} from {self.path}: {e}")
+            return None
+
+    def append(self, records: list[tuple[str, str, dict]]):
+        """Append (kind, id, data) records, then their index lines."""
+        index_lines = []
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            for kind, record_id, data in records:
+                line = (json.dumps({"kind": kind, "id": record_id, "data": data}, sort_keys=True) + "\n").encode()
+                f.write(line)
+                entry = _entry(kind, record_id)
+                self._index[entry] = (offset, len(line))
+                index_lines.append(json.dumps([entry, offset, len(line)]) + "\n")
+                offset += len(line)
+
+        with open(self.index_path, 'a') as f:
+            f.writelines(index_lines)
+
+def _entry(kind: str, record_id) -> str:
+    return f"{kind}:{record_id}"
+
+def _applied_by_every_save(seed_path: str) -> set:
+    """Item keys applied by every save ledger of the seed. A save that hasn't applied one still reads it from the archive."""
+    ledgers = [reconcile.AppliedLedger.load(path).applied for path in glob.glob(os.path.join(seed_path, "applied_*.json"))]
+    if not ledgers:
+        return set()
+    return set.intersection(*ledgers)
+
+def _acknowledged_checks(seed_path: str) -> set[str]:
+    """Check ids the client confirmed in the ack file. Without that file no check file is ever packed."""
+    try:
+        with open(os.path.join(seed_path, CHECK_ACK_FILE), 'r') as f:
+            return {str(check_id) for check_id in json.load(f)}
+    except (OSError, ValueError, TypeError):
+        return set()
+
+def acknowledged_files(seed_path: str) -> list[tuple[str, str, str]]:
+    """(kind, id, path) of files safe to pack: checks the client acknowledged and items every save has applied."""
+    acknowledged = _acknowledged_checks(seed_path)
+    applied = _applied_by_every_save(seed_path)
+    found = []
+    try:
+        with os.scandir(seed_path) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.endswith(".json"):
+                    continue
+                check_id = reconcile.check_file_id(name)
+                if check_id is not None:
+                    if check_id in acknowledged:
+                        found.append(("check", check_id, entry.path))
+                elif name.startswith(reconcile.ITEM_PREFIX) and name[:-5] in applied:
+                    found.append(("item", name[:-5], entry.path))
+    except OSError:
+        return []
+    return found
+
+def iter_compact(seed_path: str, archive: SeedArchive) -> Iterator[tuple[int, int]]:
+    """Pack acknowledged files one at a time, yielding (done, total) for the task runner."""
+    files = acknowledged_files(seed_path)
+    total = len(files)
+    batch: list[tuple[str, str, dict]] = []
+    packed: list[str] = []
+    done = 0
+    for kind, record_id, path in files:
+        done += 1
+        if (kind, record_id) in archive:
+            # Packed by an earlier pass that stopped before removing it
+            packed.append(path)
+        else:
+            data = reconcile.read_item(path)
+            if data:
+                batch.append((kind, record_id, data))
+                packed.append(path)
+
+        if len(batch) >= BATCH_SIZE or done == total:
+            if batch:
+                archive.append(batch)
+            for path in packed:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            batch, packed = [], []
+        yield done, total
+
+class Compactor:
+    """Submits a compaction pass for the attached seed every COMPACT_INTERVAL seconds."""
+    __slots__ = ("interval", "seed_path", "archive", "_next", "_task")
+
+    def __init__(self, interval: float = COMPACT_INTERVAL):
+        self.interval = interval
+        self.seed_path = ""
+        self.archive: SeedArchive | None = None
+        self._next = 0.0
+        self._task = None
+
+    def attach(self, seed_path: str, archive: SeedArchive):
+        self.seed_path = seed_path
+        self.archive = archive
+
+    def poll(self, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        if now < self._next:
+            return
+        self._next = now + self.interval
+        self.submit()
+
+    def submit(self) -> bool:
+        if self.archive is None:
+            return False
+        if self._task is not None and self._task in tasks.runner:
+            return False
+        self._task = tasks.submit(f"compact {os.path.basename(self.seed_path)}", iter_compact(self.seed_path, self.archive))
+        return True
+
+    def reset(self):
+        self.seed_path = ""
+        self.archive = None
+        self._next = 0.0
+        self._task = None
+
+compactor = Compactor()
+
+@command("ap_compact", description="Pack acknowledged check and item files of the current seed into its archive")
+def cmd_ap_compact(args: Namespace) -> None:
+    if not compactor.submit():
+        logging.info("[Archipelago] No seed loaded or compaction already running")
+    elif not os.path.exists(os.path.join(compactor.seed_path, CHECK_ACK_FILE)):
+        logging.info(f"[Archipelago] No {CHECK_ACK_FILE} from the client, only received items are packed")
+
+@command("ap_archive_lookup", description="Show an archived check or received item of the current seed")
+def cmd_ap_archive_lookup(args: Namespace) -> None:
+    if compactor.archive is None:
+        logging.info("[Archipelago] No seed loaded")
+        return
+    data = compactor.archive.get(args.kind, args.id)
+    logging.info(f"[Archipelago] {args.kind} {args.id}: {data if data is not None else 'not archived'}")
+cmd_ap_archive_lookup.add_argument("kind", choices=["check", "item"])
+cmd_ap_archive_lookup.add_argument("id", help="Check location id or received item key (e.g. AP12)", type=str)
+
+commands = [
+    cmd_ap_compact,
+    cmd_ap_archive_lookup,
+]
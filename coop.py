@@ -0,0 +1,168 @@
+from argparse import Namespace
+import random
+import time
+from typing import Callable
+from mods_base import ENGINE, command
+from networking import targeted
+from unrealsdk import logging
+
+import checks
+from records import Location
+
+# ENetMode
+NM_CLIENT = 3
+
+def is_client() -> bool:
+    world_info = ENGINE.GetCurrentWorldInfo()
+    return world_info is not None and world_info.NetMode == NM_CLIENT
+
+class CheckRouter:
+    """Routes check candidates so a co-op session writes every check once.
+
+    The host emits checks itself. Clients forward the full_id of each candidate to the host
+    instead. Both sides drop ids they already routed, so repeated deaths, reloads and four
+    players seeing the same event all coalesce into one emit on the host. Clients need no
+    seed or config of their own, the host decides with accepts() which forwarded checks count.
+    Until ready() the host has nowhere to emit to, its checks are held and flush() emits them.
+    """
+    __slots__ = ("is_host", "seen", "held", "locations", "accepts", "ready", "_emit", "_forward", "candidates", "forwarded", "emitted")
+
+    def __init__(self, emit: Callable[[Location], object], forward: Callable[[int], object], is_host: bool = True):
+        self.is_host = is_host
+        self.seen: set[int] = set()
+        # full_id -> Location of checks that came in before ready(), not in seen yet
+        self.held: dict[int, Location] = {}
+        # full_id -> Location, to resolve forwarded ids on the host
+        self.locations: dict[int, Location] = {}
+        # Whether the host's config enables a forwarded check
+        self.accepts: Callable[[Location], bool] = lambda location: True
+        # Whether emitted checks reach a live session queue
+        self.ready: Callable[[], bool] = lambda: True
+        self._emit = emit
+        self._forward = forward
+        self.candidates = 0
+        self.forwarded = 0
+        self.emitted = 0
+
+    def route(self, location: Location) -> bool:
+        """Handle a locally observed check. Returns True if it was emitted or forwarded."""
+        self.candidates += 1
+        full_id = location.full_id
+        if full_id in self.seen:
+            return False
+        if self.is_host:
+            return self._emit_or_hold(location)
+
+        self.seen.add(full_id)
+        self._forward(full_id)
+        self.forwarded += 1
+        return True
+
+    def receive(self, full_id: int) -> bool:
+        """Handle a candidate forwarded by a client, on the host."""
+        self.candidates += 1
+        if not self.is_host or full_id in self.seen:
+            return False
+
+        location = self.locations.get(full_id)
+        if location is None:
+            logging.info(f"[Archipelago] Client forwarded unknown check {full_id}")
+            return False
+        # Not marked seen, so it still counts if the check type is enabled later
+        if not self.accepts(location):
+            return False
+        return self._emit_or_hold(location)
+
+    def _emit_or_hold(self, location: Location) -> bool:
+        # Marked seen only once emitted, a check emitted before there is a session queue would be lost
+        if not self.ready():
+            self.held[location.full_id] = location
+            return False
+
+        self.seen.add(location.full_id)
+        self._emit(location)
+        self.emitted += 1
+        return True
+
+    def flush(self) -> int:
+        """Emit the checks held while not ready(), returns how many were emitted."""
+        held, self.held = self.held, {}
+        return sum(self._emit_or_hold(location) for location in held.values())
+
+    def reset(self):
+        self.seen.clear()
+        self.held.clear()
+        self.candidates = self.forwarded = self.emitted = 0
+
+    def __repr__(self):
+        role = "host" if self.is_host else "client"
+        return f"CheckRouter({role}: {self.candidates} candidates, {self.emitted} emitted, {self.forwarded} forwarded, {len(self.held)} held)"
+
+@targeted.server
+def forward_check(full_id: int) -> None:
+    """Sent by clients, runs on the host."""
+    router.receive(full_id)
+
+router = CheckRouter(checks.send_check, forward_check)
+
+def send_check(location: Location) -> bool:
+    return router.route(location)
+
+def detect_role():
+    router.is_host = not is_client()
+    logging.info(f"[Archipelago] Routing checks as {'host' if router.is_host else 'client'}")
+
+def simulate(players: int, events: int, locations: int, rng: random.Random) -> tuple[int, int]:
+    """Run one host and players - 1 clients over a shared event stream, without the engine.
+
+    Every event is seen by a random subset of the players, like a boss kill everyone is
+    nearby for or a region each player loads into. Returns (candidates, writes).
+    """
+    writes: list[int] = []
+    table = {
+        full_id: Location(full_id, f"Location {full_id}", "Reach", "region", f"Reach Location {full_id}", "")
+        for full_id in range(locations)
+    }
+
+    host = CheckRouter(lambda location: writes.append(location.full_id), lambda full_id: None, is_host=True)
+    host.locations = table
+    # Clients forward straight into the host, standing in for forward_check's network hop
+    clients = [CheckRouter(lambda location: None, host.receive, is_host=False) for _ in range(players - 1)]
+    routers = [host, *clients]
+
+    candidates = 0
+    observed = set()
+    for _ in range(events):
+        location = table[rng.randrange(locations)]
+        observed.add(location.full_id)
+        for player in rng.sample(routers, rng.randint(1, players)):
+            player.route(location)
+            candidates += 1
+
+    if len(writes) != len(observed) or set(writes) != observed:
+        raise AssertionError(f"{len(writes)} writes for {len(observed)} observed checks")
+    return candidates, len(writes)
+
+@command("ap_coop_simulate", description="Simulate co-op check routing with several controllers and verify one write per check")
+def cmd_ap_coop_simulate(args: Namespace) -> None:
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    try:
+        candidates, writes = simulate(args.players, args.events, args.locations, rng)
+    except AssertionError as e:
+        logging.error(f"[Archipelago] Co-op simulation failed: {e}")
+        return
+    elapsed = time.perf_counter() - start
+    logging.info(f"[Archipelago] {args.players} players, {candidates} candidates -> {writes} writes in {elapsed * 1000:.1f} ms")
+cmd_ap_coop_simulate.add_argument("players", type=int, nargs="?", default=4)
+cmd_ap_coop_simulate.add_argument("--events", type=int, default=10000)
+cmd_ap_coop_simulate.add_argument("--locations", type=int, default=500)
+cmd_ap_coop_simulate.add_argument("--seed", type=int, default=0)
+
+commands = [
+    cmd_ap_coop_simulate,
+]
+
+network_functions = [
+    forward_check,
+]
@@ -0,0 +1,128 @@
+from argparse import Namespace
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Callable
+from mods_base import command, get_pc
+from unrealsdk import logging
+
+# Seconds of grants delivered per tick once it is safe
+TICK_BUDGET = 0.001
+# Seconds since the player last took damage before a fight counts as over
+COMBAT_COOLDOWN = 5.0
+
+class Priority(IntEnum):
+    URGENT = 0
+    NORMAL = 1
+
+class Grant:
+    __slots__ = ("key", "name", "priority", "deliver", "queued")
+
+    def __init__(self, key, name: str, priority: Priority, deliver: Callable[[], None]):
+        self.key = key
+        self.name = name
+        self.priority = priority
+        self.deliver = deliver
+        self.queued = time.perf_counter()
+
+    def __repr__(self):
+        return f"Grant({self.name}, {self.priority.name})"
+
+def is_safe_moment() -> bool:
+    """Cheap check that a spawn or backpack insertion won't hitch a fight: menu open, or alive, idle and out of combat."""
+    pc = get_pc()
+    if not pc:
+        return False
+    if pc.IsPaused():
+        return True
+
+    pawn = pc.Pawn
+    if not pawn or pawn.Health <= 0:
+        return False
+    if pawn.Weapon and pawn.Weapon.IsFiring():
+        return False
+    return pc.WorldInfo.TimeSeconds - pawn.LastPainTime >= COMBAT_COOLDOWN
+
+class DeliveryQueue:
+    """Holds item grants until is_safe() passes, then delivers them within a per-tick budget.
+
+    Grants are delivered by priority, then in the order they were queued. URGENT grants
+    skip the safety check. Keys are unique, pushing a key that is already waiting does nothing.
+    """
+    __slots__ = ("_heap", "_keys", "_order", "is_safe", "budget", "delivered")
+
+    def __init__(self, is_safe: Callable[[], bool] = is_safe_moment, budget: float = TICK_BUDGET):
+        self._heap: list[tuple[int, int, Grant]] = []
+        self._keys: set = set()
+        self._order = itertools.count()
+        self.is_safe = is_safe
+        self.budget = budget
+        self.delivered = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return (grant for _, _, grant in sorted(self._heap))
+
+    def push(self, key, name: str, deliver: Callable[[], None], priority: Priority = Priority.NORMAL) -> bool:
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        heapq.heappush(self._heap, (priority, next(self._order), Grant(key, name, priority, deliver)))
+        return True
+
+    def drain(self, budget: float | None = None) -> int:
+        """Deliver grants until the budget is spent, returns how many were delivered."""
+        if not self._heap:
+            return 0
+
+        deadline = time.perf_counter() + (self.budget if budget is None else budget)
+        safe = None
+        delivered = 0
+        while self._heap:
+            grant = self._heap[0][2]
+            if grant.priority is not Priority.URGENT:
+                # Only evaluated once a normal grant is actually next
+                if safe is None:
+                    safe = self.is_safe()
+                if not safe:
+                    break
+
+            heapq.heappop(self._heap)
+            self._keys.discard(grant.key)
+            try:
+                grant.deliver()
+                delivered += 1
+            except Exception as e:
+                logging.error(f"[Archipelago] Delivering {grant.name} failed: {e}")
+
+            if time.perf_counter() >= deadline:
+                break
+
+        self.delivered += delivered
+        return delivered
+
+    def clear(self):
+        self._heap.clear()
+        self._keys.clear()
+
+queue = DeliveryQueue()
+
+def push(key, name: str, deliver: Callable[[], None], priority: Priority = Priority.NORMAL) -> bool:
+    return queue.push(key, name, deliver, priority)
+
+@command("ap_deliveries", description="Show item grants waiting for a safe moment")
+def cmd_ap_deliveries(args: Namespace) -> None:
+    now = time.perf_counter()
+    logging.info(f"[Archipelago] {len(queue)} waiting, {queue.delivered} delivered, safe now: {queue.is_safe()}")
+    for grant in queue:
+        logging.info(f"[Archipelago]   {grant} waiting {now - grant.queued:.1f} s")
+
+commands = [
+    cmd_ap_deliveries,
+]
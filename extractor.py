@@ -0,0 +1,127 @@
+from argparse import Namespace
+import json
+import os
+import time
+from typing import Iterator
+from mods_base import (
+    command,
+    get_pc,
+)
+from unrealsdk import logging, find_all
+
+import paths
+
+FORMAT_VERSION = 1
+
+def _path(obj) -> str | None:
+    return obj._path_name() if obj else None
+
+def iter_fasttravels() -> Iterator[dict]:
+    pc = get_pc()
+    if not pc:
+        return
+    for station in pc.GetWillowGlobals().GetFastTravelStationsLookup().FastTravelStationLookupList:
+        yield {
+            "kind": "fasttravel",
+            "path": _path(station),
+            "name": station.StationDisplayName,
+            "send_only": station.bSendOnly,
+            "initially_active": station.bInitiallyActive,
+            "dlc": _path(station.DlcExpansion),
+        }
+
+def iter_missions() -> Iterator[dict]:
+    for mission in find_all("MissionDefinition"):
+        yield {
+            "kind": "mission",
+            "path": _path(mission),
+            "name": mission.MissionName,
+            "plot_critical": mission.bPlotCritical,
+            "dlc": _path(mission.DlcExpansion),
+        }
+
+def iter_skills() -> Iterator[dict]:
+    for skill in find_all("SkillDefinition"):
+        yield {
+            "kind": "skill",
+            "path": _path(skill),
+            "name": skill.SkillName,
+            "max_grade": skill.MaxGrade,
+        }
+
+def iter_challenges() -> Iterator[dict]:
+    for challenge in find_all("ChallengeDefinition"):
+        yield {
+            "kind": "challenge",
+            "path": _path(challenge),
+            "name": challenge.ChallengeName,
+            "map": str(challenge.AssociatedMap),
+        }
+
+def iter_item_pools() -> Iterator[dict]:
+    for pool in find_all("ItemPoolDefinition"):
+        yield {
+            "kind": "item_pool",
+            "path": _path(pool),
+            "items": [_path(b.ItmPoolDefinition or b.InvBalanceDefinition) for b in pool.BalancedItems],
+        }
+
+EXTRACTORS = {
+    "fasttravel": iter_fasttravels,
+    "mission": iter_missions,
+    "skill": iter_skills,
+    "challenge": iter_challenges,
+    "item_pool": iter_item_pools,
+}
+
+def extract(path: str, kinds=None) -> dict[str, int]:
+    """Walk the requested kinds once and stream one JSON object per line to path.
+
+    Each record is written as soon as it is produced, nothing is collected in memory.
+    Keys are sorted so two extracts (e.g. with and without a DLC) diff cleanly.
+    The file is written next to path and renamed into place when complete.
+    """
+    kinds = kinds or EXTRACTORS.keys()
+    counts = {}
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(json.dumps({"kind": "meta", "version": FORMAT_VERSION, "kinds": list(kinds)}, sort_keys=True))
+        f.write("\n")
+        for kind in kinds:
+            count = 0
+            for record in EXTRACTORS[kind]():
+                f.write(json.dumps(record, sort_keys=True, separators=(",", ":")))
+                f.write("\n")
+                count += 1
+            counts[kind] = count
+
+    os.replace(tmp_path, path)
+    return counts
+
+@command("ap_extract_data", description="Extract fast travels, missions, skills, challenges and item pools to NDJSON")
+def cmd_ap_extract_data(args: Namespace) -> None:
+    kinds = args.kinds or None
+    unknown = set(kinds or ()) - EXTRACTORS.keys()
+    if unknown:
+        logging.error(f"[Archipelago] Unknown kinds {sorted(unknown)}, expected {sorted(EXTRACTORS)}")
+        return
+
+    directory = paths.get_game_communication_path()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, args.filename)
+
+    start = time.perf_counter()
+    try:
+        counts = extract(path, kinds)
+    except OSError as e:
+        logging.error(f"[Archipelago] Could not write {path}: {e}")
+        return
+
+    logging.info(f"[Archipelago] Extracted {counts} to {path} in {time.perf_counter() - start:.2f} s")
+cmd_ap_extract_data.add_argument("kinds", help="Kinds to extract, all if omitted", type=str, nargs="*")
+cmd_ap_extract_data.add_argument("--filename", help="Output file name", type=str, default="bl2_extract.ndjson")
+
+commands = [
+    cmd_ap_extract_data,
+]
@@ -9,6 +9,10 @@ from unrealsdk.hooks import Type #type:ignore
 from unrealsdk.unreal import BoundFunction, UObject, WrappedStruct #type:ignore
 from typing import Any
 
+import paths
+import patches
+import tasks
+
 locationDisplayNames = []
 locationStationDefinitions = []
 locationStationStrings = []
@@ -27,56 +31,76 @@ def export_fasttravel_names():
     import json
     if get_pc():
         fasttravels = get_pc().GetWillowGlobals().GetFastTravelStationsLookup().FastTravelStationLookupList
-        names = []
+        station_names = []
         for fasttravel in fasttravels:
             if fasttravel.bSendOnly or fasttravel.DlcExpansion: continue
 
-            names.append(fasttravel.StationDisplayName)
+            station_names.append(fasttravel.StationDisplayName)
 
-        with open(os.path.join(os.path.expandvars(r"%localappdata%/BL2Archipelago"), "ap_fasttravels.json"), "w") as f:
-            json.dump(names, f, indent=2)
+        with open(os.path.join(paths.get_game_communication_path(), "ap_fasttravels.json"), "w") as f:
+            json.dump(station_names, f, indent=2)
 
-def get_fasttravel_definition_by_name(name):
+def station_entries():
+    """Name resolver builder, registered as "stations" when the mod is enabled."""
     if get_pc():
         for fasttravel in get_pc().GetWillowGlobals().GetFastTravelStationsLookup().FastTravelStationLookupList:
-            if name in fasttravel.StationDisplayName:
-                return fasttravel
-    return None
+            yield fasttravel.StationDisplayName, fasttravel
+
+def _stations():
+    # names is imported when the mod is enabled, lookups only happen after that
+    import names
+    return names.get("stations")
+
+def get_fasttravel_definition_by_name(name):
+    return _stations().unique(name)
 
 def try_teleport_to_fasttravel_station(name):
-    if get_pc():
-        for fasttravel in get_pc().GetWillowGlobals().GetFastTravelStationsLookup().FastTravelStationLookupList:
-            if name in fasttravel.StationDisplayName:
-                get_pc().ServerTeleportPlayerToStation(fasttravel)
+    fasttravel = get_fasttravel_definition_by_name(name)
+    if fasttravel and get_pc():
+        get_pc().ServerTeleportPlayerToStation(fasttravel)
+    else:
+        logging.info(f"[Archipelago] No fast travel station matches {name}")
+
+def _add_station(fasttravel):
+    # Registering the same station twice would list it twice in the travel menu
+    if fasttravel in locationStationDefinitions:
+        return
+    locationDisplayNames.append(fasttravel.StationDisplayName)
+    locationStationDefinitions.append(fasttravel)
+    locationStationStrings.append(fasttravel.StationDisplayName)
 
 def register_fasttravel(name):
+    # AP item names only differ in case or punctuation, never guess a different station
+    fasttravel = _stations().exact(name)
+    if not fasttravel or fasttravel.bSendOnly or fasttravel.DlcExpansion:
+        return False
+    patches.engine.set(fasttravel, "MissionDependencies", [])
+    _add_station(fasttravel)
+    return True
+
+def is_station(name) -> bool:
+    return _stations().exact(name) is not None
+
+def iter_register_all_fasttravel():
     if get_pc():
-        for fasttravel in get_pc().GetWillowGlobals().GetFastTravelStationsLookup().FastTravelStationLookupList:
-            if fasttravel.bSendOnly or fasttravel.DlcExpansion: continue
-
-            if name == fasttravel.StationDisplayName:
-                fasttravel.MissionDependencies = []
-                locationDisplayNames.append(fasttravel.StationDisplayName)
-                locationStationDefinitions.append(fasttravel)
-                locationStationStrings.append(fasttravel.StationDisplayName)
+        fasttravels = get_pc().GetWillowGlobals().GetFastTravelStationsLookup().FastTravelStationLookupList
+        total = len(fasttravels)
+        for i, fasttravel in enumerate(fasttravels):
+            if not (fasttravel.bSendOnly or fasttravel.DlcExpansion):
+                patches.engine.set(fasttravel, "MissionDependencies", [])
+                _add_station(fasttravel)
+            yield i + 1, total
 
 def register_all_fasttravel():
-    if get_pc():
-        for fasttravel in get_pc().GetWillowGlobals().GetFastTravelStationsLookup().FastTravelStationLookupList:
-            if fasttravel.bSendOnly or fasttravel.DlcExpansion: continue
-            
-            fasttravel.MissionDependencies = []
-            locationDisplayNames.append(fasttravel.StationDisplayName)
-            locationStationDefinitions.append(fasttravel)
-            locationStationStrings.append(fasttravel.StationDisplayName)
+    for _ in iter_register_all_fasttravel():
+        pass
 
 def unregister_fasttravel(name):
-    if get_pc():
-        for fasttravel in get_pc().GetWillowGlobals().GetFastTravelStationsLookup().FastTravelStationLookupList:
-            if name == fasttravel.StationDisplayName:
-                locationDisplayNames.remove(fasttravel.StationDisplayName)
-                locationStationDefinitions.remove(fasttravel)
-                locationStationStrings.remove(fasttravel.StationDisplayName)
+    fasttravel = _stations().exact(name)
+    if fasttravel in locationStationDefinitions:
+        locationDisplayNames.remove(fasttravel.StationDisplayName)
+        locationStationDefinitions.remove(fasttravel)
+        locationStationStrings.remove(fasttravel.StationDisplayName)
 
 @command("ap_get_fasttravel_defs", description="Get all fast travel definitions")
 def cmd_get_fasttravel_defs(args):
@@ -94,7 +118,7 @@ cmd_register_fasttravel.add_argument("name", type=str, help="Name of the fast tr
 
 @command("ap_register_all_fasttravels", description="Register all fast travel locations")
 def cmd_register_all_fasttravels(args):
-    register_all_fasttravel()
+    tasks.submit("register all fast travels", iter_register_all_fasttravel())
 
 @command("ap_unregister_fasttravel", description="Unregister a specific fast travel location")
 def cmd_unregister_fasttravel(args):
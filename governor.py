@@ -0,0 +1,117 @@
+from argparse import Namespace
+import time
+from typing import Callable
+from mods_base import command
+from unrealsdk import logging
+
+# Seconds of mod work per frame across all subsystems
+FRAME_BUDGET = 0.0005
+
+class Subsystem:
+    """One kind of per-frame mod work and its statistics.
+
+    work(allowance) gets the seconds it may spend this frame; work that can split itself
+    should stop once they are used and continue next frame.
+    """
+    __slots__ = ("name", "priority", "share", "work", "pending", "calls", "deferred", "total", "worst")
+
+    def __init__(self, name: str, priority: int, share: float, work: Callable[[float], object], pending: Callable[[], bool]):
+        self.name = name
+        self.priority = priority
+        self.share = share
+        self.work = work
+        self.pending = pending
+        self.calls = 0
+        self.deferred = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def __repr__(self):
+        average = self.total / self.calls * 1e6 if self.calls else 0.0
+        return f"{self.name}: {self.calls} runs, avg {average:.0f} us, worst {self.worst * 1e6:.0f} us, {self.deferred} deferred"
+
+class FrameGovernor:
+    """Bounds the mod's work per frame.
+
+    Subsystems run in priority order (lowest first), each with share * budget seconds. Once
+    a frame has spent its budget, the remaining subsystems are deferred to the next frame,
+    where they are still pending and run again in priority order.
+    """
+    __slots__ = ("_subsystems", "budget", "frames", "overruns", "worst_frame", "last_frame")
+
+    def __init__(self, budget: float = FRAME_BUDGET):
+        self._subsystems: list[Subsystem] = []
+        self.budget = budget
+        self.frames = 0
+        self.overruns = 0
+        self.worst_frame = 0.0
+        self.last_frame = 0.0
+
+    def __iter__(self):
+        return iter(self._subsystems)
+
+    def register(self, name: str, priority: int, share: float, work: Callable[[float], object], pending: Callable[[], bool] = lambda: True) -> Subsystem:
+        subsystem = Subsystem(name, priority, share, work, pending)
+        self._subsystems.append(subsystem)
+        self._subsystems.sort(key=lambda s: s.priority)
+        return subsystem
+
+    def run_frame(self) -> float:
+        """Run pending subsystems for this frame. Returns the time spent."""
+        start = time.perf_counter()
+        deadline = start + self.budget
+        for subsystem in self._subsystems:
+            if not subsystem.pending():
+                continue
+
+            now = time.perf_counter()
+            if now >= deadline:
+                subsystem.deferred += 1
+                continue
+
+            try:
+                subsystem.work(min(subsystem.share * self.budget, deadline - now))
+            except Exception as e:
+                logging.error(f"[Archipelago] {subsystem.name} failed: {e}")
+            elapsed = time.perf_counter() - now
+            subsystem.calls += 1
+            subsystem.total += elapsed
+            subsystem.worst = max(subsystem.worst, elapsed)
+
+        spent = time.perf_counter() - start
+        self.frames += 1
+        self.last_frame = spent
+        self.worst_frame = max(self.worst_frame, spent)
+        if spent > self.budget:
+            self.overruns += 1
+        return spent
+
+    def reset_stats(self):
+        self.frames = self.overruns = 0
+        self.worst_frame = self.last_frame = 0.0
+        for subsystem in self._subsystems:
+            subsystem.calls = subsystem.deferred = 0
+            subsystem.total = subsystem.worst = 0.0
+
+governor = FrameGovernor()
+
+@command("ap_frame_stats", description="Show per-frame mod work statistics")
+def cmd_ap_frame_stats(args: Namespace) -> None:
+    overrun_rate = governor.overruns / governor.frames * 100 if governor.frames else 0.0
+    logging.info(f"[Archipelago] Budget {governor.budget * 1e6:.0f} us, {governor.frames} frames, {governor.overruns} over budget ({overrun_rate:.2f}%), worst {governor.worst_frame * 1e6:.0f} us")
+    for subsystem in governor:
+        logging.info(f"[Archipelago]   {subsystem}")
+    if args.reset:
+        governor.reset_stats()
+cmd_ap_frame_stats.add_argument("--reset", action="store_true", help="Reset the statistics afterwards")
+
+@command("ap_frame_budget", description="Set the per-frame mod work budget in microseconds")
+def cmd_ap_frame_budget(args: Namespace) -> None:
+    governor.budget = args.microseconds / 1e6
+    logging.info(f"[Archipelago] Frame budget set to {args.microseconds} us")
+cmd_ap_frame_budget.add_argument("microseconds", type=int)
+
+commands = [
+    cmd_ap_frame_stats,
+    cmd_ap_frame_budget,
+]
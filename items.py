@@ -1,23 +1,38 @@
+import time
 from typing import Optional, Sequence, Tuple
 from ui_utils.hud_message import show_hud_message
-from unrealsdk.unreal import UObject, UStructProperty, WrappedStruct, UScriptStruct
+import delivery
+import notifications
+from unrealsdk.unreal import UObject, UStructProperty, WeakPointer, WrappedStruct, UScriptStruct
 from mods_base import (
     ENGINE,
     command, 
     get_pc,
 )
 import unrealsdk
-from unrealsdk import find_object, logging, construct_object, make_struct, find_class
-try:
-    from unrealsdk.hooks import add_hook, remove_hook, Type  # modern sdk
-except Exception:
-    add_hook = None
-    remove_hook = None
-    Type = None
+from unrealsdk import find_all, find_object, logging, construct_object, make_struct, find_class
+
+# (add_hook, remove_hook, Type), resolved on first use instead of at mod discovery
+_hook_api = None
+
+def _get_hook_api():
+    global _hook_api
+    if _hook_api is None:
+        try:
+            from unrealsdk.hooks import add_hook, remove_hook, Type  # modern sdk
+            _hook_api = (add_hook, remove_hook, Type)
+        except Exception:
+            _hook_api = (None, None, None)
+    return _hook_api
+
+def _pre_hook_type():
+    return _get_hook_api()[2].PRE
 
 # Compatibility wrapper: prefer unrealsdk.hooks.add_hook/remove_hook, fall back to
 # legacy RegisterHook/RemoveHook or RunHook/RemoveHook if available in the environment.
 def _register_hook(func_name: str, hook_type, hook_id: str, hook_fn):
+    add_hook, _, Type = _get_hook_api()
+
     # Try modern API
     if add_hook is not None and Type is not None:
         try:
@@ -44,6 +59,8 @@ def _register_hook(func_name: str, hook_type, hook_id: str, hook_fn):
     return False
 
 def _remove_hook(func_name: str, hook_type, hook_id: str):
+    _, remove_hook, Type = _get_hook_api()
+
     # Try modern API
     if remove_hook is not None and Type is not None:
         try:
@@ -257,6 +274,47 @@ def spawn_item():
 
 
 def spawn_and_give_item(pool_path: str = "GD_Itempools.WeaponPools.Pool_Weapons_All_06_Legendary"):
+    """Queue spawning an item from the given pool into the player's backpack, delivered at a safe moment."""
+    delivery.push(object(), f"item from {pool_path}", lambda: _spawn_and_give_item(pool_path))
+
+def _spawn_and_give_item(pool_path: str):
+    pool = find_object("ItemPoolDefinition", pool_path)
+    if not pool:
+        logging.info(f"[Archipelago] Could not find item pool: {pool_path}")
+        return
+    _spawn_and_give_from_pool(pool)
+
+# Single entry pool give_balance wraps each balance in. Its outer is the player controller,
+# so it is constructed again once the engine collected it with a previous map.
+_balance_pool = WeakPointer()
+
+def _get_balance_pool(pc):
+    global _balance_pool
+    pool = _balance_pool()
+    if pool is None:
+        pool = construct_object(cls="ItemPoolDefinition", outer=pc, name=f"ArchipelagoPool_{int(time.time()*1000)}")
+        _balance_pool = WeakPointer(pool)
+    return pool
+
+def give_balance(balance_path: str) -> bool:
+    """Spawn one item of the given balance definition into the player's backpack.
+
+    The balance is wrapped in a single entry pool, so the engine still rolls its parts.
+    Returns True if the spawn was started.
+    """
+    pc = get_pc()
+    balance = find_object("Object", balance_path)
+    if not pc or not balance:
+        logging.info(f"[Archipelago] Could not give {balance_path}")
+        return False
+
+    # Only the entry changes between grants, the spawner rolls the pool within ApplyBehaviorToContext
+    pool = _get_balance_pool(pc)
+    probability = make_struct("AttributeInitializationData", BaseValueConstant=1.0, BaseValueScaleConstant=1.0)
+    pool.BalancedItems = [make_struct("BalancedInventoryData", InvBalanceDefinition=balance, Probability=probability, bDropOnDeath=True)]
+    return _spawn_and_give_from_pool(pool)
+
+def _spawn_and_give_from_pool(pool) -> bool:
     """Spawn an item from the given pool at the player and immediately add it to the player's backpack.
 
     This hooks the Behavior_SpawnLootAroundPoint.PlaceSpawnedItems event for the spawner
@@ -265,12 +323,7 @@ def spawn_and_give_item(pool_path: str = "GD_Itempools.WeaponPools.Pool_Weapons_
     pc = get_pc()
     if not pc:
         logging.info("[Archipelago] No player controller available for spawn_and_give_item()")
-        return
-
-    pool = find_object("ItemPoolDefinition", pool_path)
-    if not pool:
-        logging.info(f"[Archipelago] Could not find item pool: {pool_path}")
-        return
+        return False
 
     spawner_name = f"LootSpawner_{int(time.time()*1000)}"
     spawner = construct_object(cls="Behavior_SpawnLootAroundPoint", outer=pc, name=spawner_name)
@@ -295,11 +348,12 @@ def spawn_and_give_item(pool_path: str = "GD_Itempools.WeaponPools.Pool_Weapons_
                         owner.InvManager.AddInventoryToBackpack(item)
                         item.Owner = owner
                         logging.info("[Archipelago] Spawned item added to player's backpack")
+                        notifications.notify("Gave item to player")
                     except Exception:
                         logging.info("[Archipelago] Failed to add spawned item to backpack")
                 # remove the hook so it only runs once
                 try:
-                    _remove_hook("WillowGame.Behavior_SpawnLootAroundPoint.PlaceSpawnedItems", Type.PRE, f"Archipelago.{id(spawner)}")
+                    _remove_hook("WillowGame.Behavior_SpawnLootAroundPoint.PlaceSpawnedItems", _pre_hook_type(), f"Archipelago.{id(spawner)}")
                 except Exception:
                     pass
         finally:
@@ -307,31 +361,55 @@ def spawn_and_give_item(pool_path: str = "GD_Itempools.WeaponPools.Pool_Weapons_
 
     # Register the hook and start the spawner
     try:
-        _register_hook("WillowGame.Behavior_SpawnLootAroundPoint.PlaceSpawnedItems", Type.PRE, f"Archipelago.{id(spawner)}", _hook)
+        _register_hook("WillowGame.Behavior_SpawnLootAroundPoint.PlaceSpawnedItems", _pre_hook_type(), f"Archipelago.{id(spawner)}", _hook)
     except Exception:
         logging.info("[Archipelago] Could not register PlaceSpawnedItems hook")
+        return False
 
     spawner.ApplyBehaviorToContext(pc, (), None, None, None, ())
+    return True
 
 
-def _get_items_from_pool(pool_obj, game_stage: int, game_stage_variance_def=None):
+def _held_inventory(pc) -> set:
+    """Inventory the player owns: the backpack and the equipped inventory chain."""
+    try:
+        inv_manager = pc.Pawn.InvManager
+    except AttributeError:
+        return set()
+    if not inv_manager:
+        return set()
+
+    held = {inv for inv in inv_manager.Backpack if inv}
+    inv = inv_manager.InventoryChain
+    while inv:
+        held.add(inv)
+        inv = inv.Inventory
+    return held
+
+def _get_items_from_pool(pool_obj, game_stage: int, game_stage_variance_def=None) -> tuple[list, int]:
     """Spawn inventory directly from an ItemPoolDefinition and return created item objects.
 
     This avoids creating a Behavior_SpawnLootAroundPoint spawner by invoking the engine's
     ItemPool.SpawnBalancedInventoryFromPool and catching created items via OnCreate hooks.
+
+    Returns (items, held). items are the roll's own SpawnedInventory out array, or else what
+    OnCreate saw during the call. Either way inventory the player already owned before the roll
+    is left out, held is how much of it was.
     """
     pc = get_pc()
     if not pc:
         logging.info("[Archipelago] No player controller available for _get_items_from_pool()")
-        return []
+        return [], 0
 
     default_item_pool = find_object('ItemPool', 'WillowGame.Default__ItemPool')
-    logging.info(f"[Archipelago] _get_items_from_pool default_item_pool {default_item_pool}")
+    logging.misc(f"[Archipelago] _get_items_from_pool default_item_pool {default_item_pool}")
 
     if not default_item_pool:
         logging.info('[Archipelago] Could not find default ItemPool object')
-        return []
+        return [], 0
 
+    # Diffed against after the roll, whatever the player owned before is never the roll's
+    held_before = _held_inventory(pc)
     spawned_items = []
 
     def _append_inv(obj, params, ret, func):
@@ -344,33 +422,90 @@ def _get_items_from_pool(pool_obj, game_stage: int, game_stage_variance_def=None
     # Register hooks to capture created items. Use unique ids so they can be removed safely.
     hook_id_item = f"Archipelago.get_items_from_pool.item.{id(pool_obj)}"
     hook_id_weapon = f"Archipelago.get_items_from_pool.weapon.{id(pool_obj)}"
-    logging.info(f"[Archipelago] _get_items_from_pool hooks {hook_id_item}, {hook_id_weapon}")
+    logging.misc(f"[Archipelago] _get_items_from_pool hooks {hook_id_item}, {hook_id_weapon}")
 
     try:
-        _register_hook("WillowGame.WillowItem:OnCreate", Type.PRE, hook_id_item, _append_inv)
-        _register_hook("WillowGame.WillowWeapon:OnCreate", Type.PRE, hook_id_weapon, _append_inv)
+        _register_hook("WillowGame.WillowItem:OnCreate", _pre_hook_type(), hook_id_item, _append_inv)
+        _register_hook("WillowGame.WillowWeapon:OnCreate", _pre_hook_type(), hook_id_weapon, _append_inv)
     except Exception:
         logging.info('[Archipelago] Could not register OnCreate hooks for pool extraction')
 
+    result = None
     try:
         # SpawnBalancedInventoryFromPool(pool, minLevel, maxLevel, instigator, extraArray, varianceDef)
-        default_item_pool.SpawnBalancedInventoryFromPool(pool_obj, game_stage, game_stage, pc, [], game_stage_variance_def)
-        logging.info(f"[Archipelago] _get_items_from_pool SpawnBalancedInventoryFromPool")
+        result = default_item_pool.SpawnBalancedInventoryFromPool(pool_obj, game_stage, game_stage, pc, [], game_stage_variance_def)
+        logging.misc(f"[Archipelago] _get_items_from_pool SpawnBalancedInventoryFromPool")
 
     except Exception as e:
         logging.info(f"[Archipelago] SpawnBalancedInventoryFromPool failed: {e}")
 
     # Cleanup hooks
     try:
-        _remove_hook("WillowGame.WillowItem:OnCreate", Type.PRE, hook_id_item)
+        _remove_hook("WillowGame.WillowItem:OnCreate", _pre_hook_type(), hook_id_item)
     except Exception:
         pass
     try:
-        _remove_hook("WillowGame.WillowWeapon:OnCreate", Type.PRE, hook_id_weapon)
+        _remove_hook("WillowGame.WillowWeapon:OnCreate", _pre_hook_type(), hook_id_weapon)
     except Exception:
         pass
 
-    return spawned_items
+    # The call is synchronous, so everything OnCreate saw during it was created by the roll
+    rolled = _get_spawned_inventory(result)
+    if rolled is None:
+        rolled = spawned_items
+    rolled = list(dict.fromkeys(inv for inv in rolled if inv))
+    items = [inv for inv in rolled if inv not in held_before]
+    return items, len(rolled) - len(items)
+
+
+# rolled: inventory created by rolls, destroyed: of those, destroyed again,
+# held: inventory a roll reported that the player already owned, which is never destroyed
+pool_roll_stats = {"rolls": 0, "rolled": 0, "destroyed": 0, "held": 0}
+
+def _get_spawned_inventory(result):
+    """Extract the SpawnedInventory out parameter from a SpawnBalancedInventoryFromPool call result."""
+    if not isinstance(result, tuple):
+        return None
+    for value in result:
+        if isinstance(value, (list, tuple)) or type(value).__name__ == "WrappedArray":
+            return [inv for inv in value if inv]
+    return None
+
+def _destroy_inventory(inventory) -> int:
+    destroyed = 0
+    for inv in inventory:
+        try:
+            inv.Destroy()
+            destroyed += 1
+        except Exception as e:
+            logging.info(f"[Archipelago] Could not destroy rolled inventory {inv}: {e}")
+    pool_roll_stats["destroyed"] += destroyed
+    return destroyed
+
+def roll_definitions_from_pool(pool_obj, game_stage: int, game_stage_variance_def=None) -> list:
+    """Roll a pool only for its DefinitionData.
+
+    The inventory actors the roll created are destroyed afterwards, so repeated rolls
+    don't leave actors behind. Returns detached copies of their DefinitionData.
+    """
+    pool_roll_stats["rolls"] += 1
+    items, held = _get_items_from_pool(pool_obj, game_stage, game_stage_variance_def)
+
+    definitions = []
+    for item in items:
+        try:
+            definitions.append(_clone_wrapped_struct(item.DefinitionData))
+        except Exception:
+            pass
+
+    pool_roll_stats["rolled"] += len(items)
+    pool_roll_stats["held"] += held
+    _destroy_inventory(items)
+    return definitions
+
+def count_live_inventory() -> int:
+    """Live WillowWeapon and WillowItem instances in the engine, including default objects."""
+    return sum(1 for cls in ("WillowWeapon", "WillowItem") for _ in find_all(cls, exact=False))
 
 
 def get_definition_data_from_pool(pool_path: str, game_stage: int = None, variance_path: str = None):
@@ -399,17 +534,13 @@ def get_definition_data_from_pool(pool_path: str, game_stage: int = None, varian
         logging.info(f"[Archipelago] get_definition_data_from_pool variance_def {variance_def}")
         variance_def = find_object('AttributeInitializationDefinition', variance_path)
 
-    items = _get_items_from_pool(pool, game_stage, variance_def)
-    logging.info(f"[Archipelago] get_definition_data_from_pool items {items}")
+    definitions = roll_definitions_from_pool(pool, game_stage, variance_def)
+    logging.info(f"[Archipelago] get_definition_data_from_pool definitions {len(definitions)}")
 
-    if not items:
+    if not definitions:
         return None
 
-    first = items[0]
-    try:
-        return first.DefinitionData
-    except Exception:
-        return None
+    return definitions[0]
 
 @command("spawn_loot", description="Spawn loot from specified pools around a point with given parameters")
 def cmd_spawn_loot(args: str):
@@ -480,11 +611,32 @@ def cmd_ap_get_def_from_pool(args: str) -> None:
         show_hud_message("Archipelago", "Got definition data from pool (raw) - see logs")
 
 
+@command("ap_roll_pool", description="Roll a pool repeatedly for definitions and report the live inventory count before and after")
+def cmd_ap_roll_pool(args) -> None:
+    pool = find_object("ItemPoolDefinition", args.pool_path)
+    if not pool:
+        logging.info(f"[Archipelago] Could not find item pool: {args.pool_path}")
+        return
+
+    pc = get_pc()
+    game_stage = pc.PlayerReplicationInfo.ExpLevel if pc else 1
+    before = count_live_inventory()
+    definitions = 0
+    start = time.perf_counter()
+    for _ in range(args.count):
+        definitions += len(roll_definitions_from_pool(pool, game_stage))
+    elapsed = time.perf_counter() - start
+
+    after = count_live_inventory()
+    logging.info(f"[Archipelago] {args.count} rolls, {definitions} definitions in {elapsed:.2f} s, live WillowWeapon/WillowItem {before} -> {after} ({after - before:+d}), totals {pool_roll_stats}")
+cmd_ap_roll_pool.add_argument("count", help="Number of rolls", type=int, nargs="?", default=1000)
+cmd_ap_roll_pool.add_argument("pool_path", help="ItemPoolDefinition path", type=str, nargs="?", default="GD_Itempools.WeaponPools.Pool_Weapons_All_06_Legendary")
+
 @command("ap_spawn_weapon", description="Spawn a weapon drop at the player")
 def cmd_ap_spawn_weapon(args: str) -> None:
     """Console command to spawn a weapon drop at the player's feet."""
     spawn_item()
-    show_hud_message("Archipelago", "Spawned weapon drop at player.")
+    notifications.notify("Spawned weapon drop at player.")
 
 
 def _spawn_and_give_clone_of_current_weapon() -> None:
@@ -585,13 +737,14 @@ def _spawn_and_give_clone_of_current_weapon() -> None:
             pass
 
         logging.info("[Archipelago] Spawned and gave cloned weapon to player")
-        show_hud_message("Archipelago", "Gave cloned weapon to player")
+        notifications.notify("Gave cloned weapon to player")
     except Exception as e:
         logging.info(f"[Archipelago] Failed to initialize or give weapon: {e}")
 
 @command("ap_give_weapon", description="Spawn a copy of your current weapon and add it to inventory")
 def cmd_ap_give_weapon(args: str) -> None:
-    _spawn_and_give_clone_of_current_weapon()
+    # Spawning mid-fight hitches, the clone waits for a safe moment like any other grant
+    delivery.push(object(), "weapon clone", _spawn_and_give_clone_of_current_weapon)
 
 @command("ap_give_weapon_from_pool", description="Spawn a weapon from a pool (e.g. legendary) and add it to inventory")
 def cmd_ap_give_weapon_from_pool(args: str) -> None:
@@ -600,6 +753,9 @@ def cmd_ap_give_weapon_from_pool(args: str) -> None:
     Usage: ap_give_weapon_from_pool [pool_path]
     If pool_path is omitted a common legendary weapons pool will be used.
     """
+    delivery.push(object(), "weapon from pool", _give_weapon_from_pool)
+
+def _give_weapon_from_pool():
     pc = get_pc()
     if not pc:
         logging.info("[Archipelago] No player controller available for give-from-pool command")
@@ -630,19 +786,19 @@ def cmd_ap_give_weapon_from_pool(args: str) -> None:
                         owner.InvManager.AddInventoryToBackpack(item)
                         item.Owner = owner
                         logging.info("[Archipelago] Spawned pool item added to player's backpack")
-                        show_hud_message("Archipelago", "Gave item from pool to player")
+                        notifications.notify("Gave item from pool to player")
                     except Exception:
                         logging.info("[Archipelago] Failed to add spawned pool item to backpack")
                 # remove hook
                 try:
-                    _remove_hook("WillowGame.Behavior_SpawnLootAroundPoint.PlaceSpawnedItems", Type.PRE, f"Archipelago.{id(spawner)}")
+                    _remove_hook("WillowGame.Behavior_SpawnLootAroundPoint.PlaceSpawnedItems", _pre_hook_type(), f"Archipelago.{id(spawner)}")
                 except Exception:
                     pass
         finally:
             return True
 
     try:
-        _register_hook("WillowGame.Behavior_SpawnLootAroundPoint.PlaceSpawnedItems", Type.PRE, f"Archipelago.{id(spawner)}", one_shot)
+        _register_hook("WillowGame.Behavior_SpawnLootAroundPoint.PlaceSpawnedItems", _pre_hook_type(), f"Archipelago.{id(spawner)}", one_shot)
     except Exception:
         logging.info("[Archipelago] Could not register PlaceSpawnedItems hook for pool spawn")
 
@@ -652,6 +808,7 @@ commands = [
     cmd_ap_give_weapon,
     cmd_ap_give_weapon_from_pool,
     cmd_ap_get_def_from_pool,
+    cmd_ap_roll_pool,
     cmd_ap_spawn_weapon,
     cmd_spawn_loot
     ]
\ No newline at end of file
@@ -0,0 +1,76 @@
+from enum import IntEnum
+from typing import Callable
+from unrealsdk import logging
+
+class Phase(IntEnum):
+    MENU = 0
+    LOADING = 1
+    SPAWNED = 2
+    CONNECTED = 3
+    CONFIGURED = 4
+    IN_GAME = 5
+
+# Phases whose work is done once per session instead of once per load
+SESSION_PHASES = frozenset((Phase.CONNECTED, Phase.CONFIGURED))
+
+class Lifecycle:
+    """Session state machine: menu -> loading -> spawned -> connected -> configured -> in-game.
+
+    Engine hooks only call advance() or fall_back(); the work for each phase is registered
+    with on_enter() and runs exactly once per transition into that phase. Session phases
+    are only worked through once, later map loads pass through them for free.
+    in_game is a plain attribute so other subsystems can poll it every tick.
+    """
+    __slots__ = ("phase", "in_game", "_reached", "_handlers")
+
+    def __init__(self):
+        self.phase = Phase.MENU
+        self.in_game = False
+        self._reached: set[Phase] = set()
+        self._handlers: dict[Phase, list[Callable[[], bool | None]]] = {phase: [] for phase in Phase}
+
+    def on_enter(self, phase: Phase):
+        """Decorator registering work for a phase. Returning False keeps the machine in the previous phase."""
+        def register(fn):
+            self._handlers[phase].append(fn)
+            return fn
+        return register
+
+    def reached(self, phase: Phase) -> bool:
+        return phase in self._reached
+
+    def _set(self, phase: Phase):
+        self.phase = phase
+        self.in_game = phase == Phase.IN_GAME
+
+    def advance(self, target: Phase) -> bool:
+        """Climb phase by phase up to target. Returns True if target was reached."""
+        if self.phase >= target:
+            return self.phase == target
+
+        for phase in Phase:
+            if phase <= self.phase or phase > target:
+                continue
+
+            if not (phase in SESSION_PHASES and phase in self._reached):
+                for handler in self._handlers[phase]:
+                    if handler() is False:
+                        logging.info(f"[Archipelago] Lifecycle stuck before {phase.name}")
+                        return False
+
+            self._reached.add(phase)
+            self._set(phase)
+
+        return True
+
+    def fall_back(self, phase: Phase):
+        """Drop back to an earlier phase, e.g. on a level load. Going back to MENU ends the session."""
+        if phase == Phase.MENU:
+            self._reached.clear()
+
+        if phase >= self.phase and phase != Phase.MENU:
+            return
+
+        self._set(phase)
+        for handler in self._handlers[phase]:
+            handler()
@@ -0,0 +1,172 @@
+from argparse import Namespace
+import bisect
+import itertools
+import re
+import time
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
+from mods_base import command
+from unrealsdk import logging
+
+# Minimum trigram similarity for a fuzzy match
+MIN_SIMILARITY = 0.3
+MAX_RESULTS = 5
+
+# Match tiers, in ranking order
+EXACT = 0
+PREFIX = 1
+FUZZY = 2
+
+_NOT_ALNUM = re.compile(r"[^0-9a-z]+")
+
+def normalize(name: str) -> str:
+    """Case and punctuation insensitive form: "Death Bl0ss0m!" -> "death bl0ss0m"."""
+    return _NOT_ALNUM.sub(" ", name.casefold()).strip()
+
+def trigrams(normalized: str) -> set[str]:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class Match(NamedTuple):
+    name: str
+    value: Any
+    score: float
+
+class NameResolver:
+    """Ranked name lookups over one set of names: exact, prefix and trigram fuzzy matches.
+
+    Names are compared in normalize()d form. Built once, after which a query costs a dict
+    probe, a bisect and a pass over the posting lists of the query's trigrams.
+    """
+    __slots__ = ("_names", "_values", "_normalized", "_exact", "_sorted", "_trigram_counts", "_postings")
+
+    def __init__(self, entries: Iterable[tuple[str, Any]]):
+        self._names: list[str] = []
+        self._values: list[Any] = []
+        self._normalized: list[str] = []
+        self._exact: dict[str, int] = {}
+        self._trigram_counts: list[int] = []
+        self._postings: dict[str, list[int]] = {}
+
+        for name, value in entries:
+            if not name:
+                continue
+            normalized = normalize(name)
+            i = len(self._names)
+            self._names.append(name)
+            self._values.append(value)
+            self._normalized.append(normalized)
+            self._exact.setdefault(normalized, i)
+
+            grams = trigrams(normalized)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(i)
+
+        self._sorted = sorted((normalized, i) for i, normalized in enumerate(self._normalized))
+
+    def __len__(self):
+        return len(self._names)
+
+    def _prefixed(self, normalized: str) -> Iterator[tuple[str, int]]:
+        start = bisect.bisect_left(self._sorted, (normalized,))
+        for candidate, i in self._sorted[start:]:
+            if not candidate.startswith(normalized):
+                break
+            yield candidate, i
+
+    def exact(self, name: str) -> Any:
+        i = self._exact.get(normalize(name))
+        return None if i is None else self._values[i]
+
+    def resolve(self, query: str, limit: int = MAX_RESULTS, min_similarity: float = MIN_SIMILARITY) -> list[Match]:
+        normalized = normalize(query)
+        if not normalized:
+            return []
+
+        # i -> (tier, score), exact matches rank before prefix ones and those before fuzzy ones
+        ranks: dict[int, tuple[int, float]] = {}
+        exact = self._exact.get(normalized)
+        if exact is not None:
+            ranks[exact] = (EXACT, 1.0)
+
+        for candidate, i in self._prefixed(normalized):
+            # How much of the name the query covers, so shorter names come first
+            ranks.setdefault(i, (PREFIX, len(normalized) / len(candidate)))
+
+        if len(ranks) < limit:
+            grams = trigrams(normalized)
+            shared: dict[int, int] = {}
+            for gram in grams:
+                for i in self._postings.get(gram, ()):
+                    shared[i] = shared.get(i, 0) + 1
+            for i, count in shared.items():
+                if i in ranks:
+                    continue
+                # Dice coefficient over the two trigram sets
+                similarity = 2 * count / (len(grams) + self._trigram_counts[i])
+                if similarity >= min_similarity:
+                    ranks[i] = (FUZZY, similarity)
+
+        ranked = sorted(ranks.items(), key=lambda r: (r[1][0], -r[1][1], r[0]))
+        return [Match(self._names[i], self._values[i], score) for i, (_, score) in ranked[:limit]]
+
+    def unique(self, query: str) -> Any:
+        """The exact match, else the only prefix match. For commands that change game state.
+
+        Fuzzy matches are never taken. With no unambiguous match the ranked candidates are
+        logged and None is returned.
+        """
+        normalized = normalize(query)
+        if not normalized:
+            return None
+
+        i = self._exact.get(normalized)
+        if i is not None:
+            return self._values[i]
+
+        prefixed = [i for _, i in itertools.islice(self._prefixed(normalized), 2)]
+        if len(prefixed) == 1:
+            return self._values[prefixed[0]]
+
+        candidates = ", ".join(f"{match.name} ({match.score:.2f})" for match in self.resolve(query))
+        reason = "is ambiguous" if prefixed else "has no exact or prefix match"
+        logging.info(f"[Archipelago] {query!r} {reason}, candidates: {candidates or 'none'}")
+        return None
+
+# kind -> builder yielding (name, value), resolvers are built on first use and kept until reset()
+_builders: dict[str, Callable[[], Iterable[tuple[str, Any]]]] = {}
+_resolvers: dict[str, NameResolver] = {}
+
+def register(kind: str, builder: Callable[[], Iterable[tuple[str, Any]]]):
+    _builders[kind] = builder
+
+def get(kind: str) -> NameResolver:
+    resolver = _resolvers.get(kind)
+    if resolver is None:
+        start = time.perf_counter()
+        resolver = NameResolver(_builders[kind]())
+        logging.info(f"[Archipelago] Indexed {len(resolver)} {kind} names in {(time.perf_counter() - start) * 1000:.1f} ms")
+        # Nothing to index yet (no player controller), try again on the next lookup
+        if len(resolver):
+            _resolvers[kind] = resolver
+    return resolver
+
+def reset():
+    _resolvers.clear()
+
+@command("ap_resolve", description="Show ranked name matches for stations, skills or missions")
+def cmd_ap_resolve(args: Namespace) -> None:
+    resolver = get(args.kind)
+    start = time.perf_counter()
+    matches = resolver.resolve(args.query, args.limit)
+    elapsed = time.perf_counter() - start
+    for match in matches:
+        logging.info(f"[Archipelago] {match.score:.2f} {match.name}")
+    logging.info(f"[Archipelago] {len(matches)} matches in {elapsed * 1e6:.0f} us")
+cmd_ap_resolve.add_argument("kind", choices=["stations", "skills", "missions"])
+cmd_ap_resolve.add_argument("query", type=str)
+cmd_ap_resolve.add_argument("--limit", type=int, default=MAX_RESULTS)
+
+commands = [
+    cmd_ap_resolve,
+]
@@ -0,0 +1,97 @@
+import time
+from ui_utils import show_hud_message
+
+TITLE = "Archipelago"
+# Seconds between two HUD messages
+FLUSH_INTERVAL = 2.0
+# Lines shown per HUD message, the rest is summarized
+MAX_LINES = 5
+# Distinct pending messages kept before new ones are only counted
+MAX_PENDING = 50
+
+def _pluralize(name: str, count: int) -> str:
+    if count == 1 or name.endswith("s"):
+        return name
+    return f"{name}s"
+
+class NotificationQueue:
+    """Coalesces HUD notifications and shows them at most once every FLUSH_INTERVAL seconds.
+
+    Identical messages are merged into a single line with a count, so a burst of received
+    items shows up as "Player X sent 12 Weapons" instead of twelve HUD calls.
+    """
+    __slots__ = ("_pending", "_overflow", "_last_flush", "interval", "max_lines", "max_pending")
+
+    def __init__(self, interval: float = FLUSH_INTERVAL, max_lines: int = MAX_LINES, max_pending: int = MAX_PENDING):
+        # key -> [count, formatter args]; dicts keep insertion order so lines stay chronological
+        self._pending: dict[tuple, list] = {}
+        self._overflow = 0
+        self._last_flush = 0.0
+        self.interval = interval
+        self.max_lines = max_lines
+        self.max_pending = max_pending
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _push(self, key: tuple):
+        entry = self._pending.get(key)
+        if entry is not None:
+            entry[0] += 1
+        elif len(self._pending) < self.max_pending:
+            self._pending[key] = [1]
+        else:
+            self._overflow += 1
+
+    def push(self, message: str):
+        self._push((None, message))
+
+    def push_received(self, player, item_name: str):
+        self._push((player, item_name))
+
+    def clear(self):
+        self._pending.clear()
+        self._overflow = 0
+
+    def _format(self, key: tuple, count: int) -> str:
+        player, message = key
+        if player is None:
+            return message if count == 1 else f"{message} (x{count})"
+        if count == 1:
+            return f"Player {player} sent {message}"
+        return f"Player {player} sent {count} {_pluralize(message, count)}"
+
+    def flush(self, now: float | None = None) -> bool:
+        """Show pending notifications if the interval elapsed. Returns True if the HUD was updated."""
+        if not self._pending and not self._overflow:
+            return False
+
+        now = time.monotonic() if now is None else now
+        if now - self._last_flush < self.interval:
+            return False
+        self._last_flush = now
+
+        lines = []
+        for key, (count,) in self._pending.items():
+            if len(lines) == self.max_lines:
+                break
+            lines.append(self._format(key, count))
+
+        hidden = len(self._pending) - len(lines) + self._overflow
+        if hidden:
+            lines.append(f"...and {hidden} more")
+
+        self.clear()
+        show_hud_message(TITLE, "\n".join(lines))
+        return True
+
+queue = NotificationQueue()
+
+def notify(message: str):
+    queue.push(message)
+
+def notify_received(player, item_name: str):
+    queue.push_received(player, item_name)
+
+def flush() -> bool:
+    return queue.flush()
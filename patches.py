@@ -0,0 +1,131 @@
+import copy
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+from unrealsdk import logging
+from unrealsdk.unreal import UObject, WeakPointer, WrappedArray, WrappedStruct #type:ignore
+
+@dataclass(slots=True, frozen=True)
+class PatchSet:
+    """Declares one edit: set attribute to value on every object targets() yields.
+
+    Structs must be yielded as (struct, owner) with the UObject that holds them.
+    """
+    name: str
+    targets: Callable[[], Iterable[Any]]
+    attribute: str
+    value: Any
+
+    def patches(self) -> Iterator[tuple[Any, str, Any]]:
+        for target in self.targets():
+            obj, owner = target if isinstance(target, tuple) else (target, target)
+            if obj is not None:
+                yield obj, owner, self.attribute, self.value
+
+def _snapshot(value):
+    """Detach a value from engine memory so it can be written back later."""
+    if isinstance(value, WrappedArray):
+        # Elements may be structs pointing into the array's storage
+        return [copy.copy(v) if isinstance(v, WrappedStruct) else v for v in value]
+    if isinstance(value, WrappedStruct):
+        return copy.copy(value)
+    return value
+
+def _matches(current, value) -> bool:
+    if isinstance(value, list):
+        try:
+            return list(current) == value
+        except TypeError:
+            return False
+    return current == value
+
+def _key(obj, attribute: str):
+    # Structs inside arrays aren't hashable, those are journaled per wrapper
+    try:
+        hash(obj)
+        return obj, attribute
+    except TypeError:
+        return id(obj), attribute
+
+class _Entry:
+    __slots__ = ("owner", "struct", "attribute", "original")
+
+    def __init__(self, obj, owner: UObject, attribute: str, original):
+        # Only a weak pointer to engine objects, which may be unloaded with their map
+        self.owner = WeakPointer(owner)
+        self.struct = None if obj is owner else obj
+        self.attribute = attribute
+        self.original = original
+
+    def target(self):
+        """The patched object, None if it (or the object holding the struct) was unloaded."""
+        owner = self.owner()
+        if owner is None:
+            return None
+        return owner if self.struct is None else self.struct
+
+class PatchEngine:
+    """Applies definition edits and journals the original value of everything it changes.
+
+    Writes that would not change anything are skipped and not journaled. Each (object,
+    attribute) only keeps its first original value, so re-applying never loses it.
+    undo() restores the journal in reverse order, skipping objects that were unloaded.
+    """
+    __slots__ = ("_journal",)
+
+    def __init__(self):
+        self._journal: dict[tuple[Any, str], _Entry] = {}
+
+    def __len__(self):
+        return len(self._journal)
+
+    def set(self, obj, attribute: str, value, owner: UObject | None = None) -> bool:
+        """Returns True if a write happened. Structs need the UObject they live in as owner."""
+        current = getattr(obj, attribute)
+        if _matches(current, value):
+            return False
+
+        key = _key(obj, attribute)
+        entry = self._journal.get(key)
+        # A dead entry belongs to an unloaded object whose address was reused
+        if entry is None or entry.target() is None:
+            self._journal[key] = _Entry(obj, obj if owner is None else owner, attribute, _snapshot(current))
+        setattr(obj, attribute, value)
+        return True
+
+    def apply_iter(self, patch_sets: Iterable[PatchSet]) -> Iterator[int]:
+        """Apply patch sets one object at a time, yielding the number of writes so far (for tasks)."""
+        written = 0
+        for patch_set in patch_sets:
+            for obj, owner, attribute, value in patch_set.patches():
+                if self.set(obj, attribute, value, owner):
+                    written += 1
+                yield written
+
+    def apply(self, patch_sets: Iterable[PatchSet]) -> int:
+        written = 0
+        for written in self.apply_iter(patch_sets):
+            pass
+        return written
+
+    def prune(self) -> int:
+        """Forget entries whose objects were unloaded, e.g. after a map change."""
+        dead = [key for key, entry in self._journal.items() if entry.target() is None]
+        for key in dead:
+            del self._journal[key]
+        return len(dead)
+
+    def undo(self) -> int:
+        restored = 0
+        for entry in reversed(self._journal.values()):
+            obj = entry.target()
+            if obj is None:
+                continue
+            try:
+                setattr(obj, entry.attribute, entry.original)
+                restored += 1
+            except Exception as e:
+                logging.info(f"[Archipelago] Could not restore {entry.attribute} on {obj}: {e}")
+        self._journal.clear()
+        return restored
+
+engine = PatchEngine()
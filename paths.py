@@ -0,0 +1,7 @@
+import os
+
+def get_game_communication_path() -> str:
+    """Directory shared with the Archipelago client, %localappdata%/BL2Archipelago on Windows and $HOME/BL2Archipelago elsewhere."""
+    if "localappdata" in os.environ:
+        return os.path.expandvars(r"%localappdata%/BL2Archipelago")
+    return os.path.expandvars(r"$HOME/BL2Archipelago")
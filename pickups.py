@@ -0,0 +1,112 @@
+from argparse import Namespace
+import time
+from mods_base import (
+    command,
+    get_pc,
+)
+from unrealsdk import find_object, logging
+
+from records import Location
+
+class PickupIndex:
+    """Maps inventory balance/type definitions to pickup checks.
+
+    Built on enable by resolving the object paths from shared data. Definitions that are not
+    loaded yet (at the main menu most are not) stay unresolved until refresh(), which runs
+    after every map load. Every map change invalidate()s the resolved ones first. Anything that is not in the table (ammo, money, every random gun)
+    costs a single dict probe.
+    """
+    __slots__ = ("_checks", "_unresolved")
+
+    def __init__(self, checks_by_definition: dict | None = None, unresolved: dict[str, Location] | None = None):
+        self._checks = dict(checks_by_definition or {})
+        # object path -> check, for definitions that were not loaded yet
+        self._unresolved = dict(unresolved or {})
+
+    def __len__(self):
+        return len(self._checks)
+
+    @property
+    def unresolved(self) -> int:
+        return len(self._unresolved)
+
+    @classmethod
+    def from_locations(cls, locations: dict[str, Location]) -> "PickupIndex":
+        index = cls(unresolved={loc.definition: loc for loc in locations.values() if loc.definition})
+        index.refresh()
+        return index
+
+    def refresh(self) -> int:
+        """Resolve definitions that have been loaded since. Returns how many were found."""
+        found = 0
+        for path, loc in list(self._unresolved.items()):
+            definition = find_object("Object", path)
+            if not definition:
+                continue
+            self._checks[definition] = loc
+            del self._unresolved[path]
+            found += 1
+        return found
+
+    def invalidate(self):
+        """Forget resolved definitions, which may be unloaded with the map. refresh() resolves them again."""
+        for loc in self._checks.values():
+            self._unresolved[loc.definition] = loc
+        self._checks.clear()
+
+    def match(self, inventory) -> Location | None:
+        if not self._checks or inventory is None:
+            return None
+
+        try:
+            data = inventory.DefinitionData
+        except AttributeError:
+            # Money, ammo and other pickups without DefinitionData
+            return None
+
+        check = self._checks.get(data.BalanceDefinition)
+        if check is not None:
+            return check
+
+        definition = getattr(data, "WeaponTypeDefinition", None) or getattr(data, "ItemDefinition", None)
+        return self._checks.get(definition)
+
+index = PickupIndex()
+
+def _get_inventory_sample():
+    pc = get_pc()
+    if not pc or not pc.Pawn:
+        return []
+
+    inv_manager = pc.GetPawnInventoryManager()
+    sample = list(inv_manager.Backpack)
+    for slot in range(1, 5):
+        weapon = inv_manager.GetWeaponInSlot(slot)
+        if weapon:
+            sample.append(weapon)
+    return sample
+
+@command("ap_bench_pickups", description="Measure per pickup check cost over the current inventory")
+def cmd_ap_bench_pickups(args: Namespace) -> None:
+    sample = _get_inventory_sample()
+    if not sample:
+        logging.info("[Archipelago] No inventory to benchmark with")
+        return
+
+    # A Loot Midget or a Seraph vendor spree is on the order of a few hundred pickups
+    rounds = max(1, args.count // len(sample))
+    matched = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for inventory in sample:
+            if index.match(inventory) is not None:
+                matched += 1
+    elapsed = time.perf_counter() - start
+
+    total = rounds * len(sample)
+    logging.info(f"[Archipelago] {total} pickups against {len(index)} definitions: {elapsed * 1000:.2f} ms total, {elapsed / total * 1e6:.2f} us per pickup, {matched} matched")
+cmd_ap_bench_pickups.add_argument("count", help="Number of pickups to simulate", type=int, nargs="?", default=1000)
+
+commands = [
+    cmd_ap_bench_pickups,
+]
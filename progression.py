@@ -0,0 +1,118 @@
+from typing import Callable
+from mods_base import get_pc
+from unrealsdk import find_object, logging
+from unrealsdk.unreal import WeakPointer
+
+import patches
+import skills
+
+SKILL_POINTS_PATH = "GD_Globals.Skills.INI_SkillPointsPerLevelUp"
+# Level the vanilla "skill point per level" condition is moved to, i.e. never
+DISABLED_LEVEL = 999
+
+class SkillPointOverride:
+    """Keeps the vanilla per-level skill point disabled, patching the definition once per game session.
+
+    The patched object is remembered through a weak pointer together with the value read back
+    after patching. ensure() only writes again if the engine replaced the object or the value
+    no longer matches.
+    """
+    __slots__ = ("_target", "_checksum")
+
+    def __init__(self):
+        self._target = WeakPointer()
+        self._checksum = None
+
+    @staticmethod
+    def _operand(definition):
+        expression_list = definition.ConditionalInitialization.ConditionalExpressionList
+        if not expression_list:
+            return None
+        expressions = expression_list[0].Expressions
+        if not expressions:
+            return None
+        return expressions[0]
+
+    def _read(self, definition):
+        operand = self._operand(definition)
+        return None if operand is None else (definition, operand.ConstantOperand2)
+
+    def ensure(self) -> bool:
+        """Returns True if the definition had to be (re)patched."""
+        definition = self._target()
+        if definition is not None and self._read(definition) == self._checksum:
+            return False
+
+        definition = find_object("AttributeInitializationDefinition", SKILL_POINTS_PATH)
+        operand = self._operand(definition)
+        if operand is None:
+            logging.info(f"[Archipelago] {SKILL_POINTS_PATH} has no level condition to patch")
+            return False
+
+        logging.info(f"[Archipelago] Disabling vanilla skillpoints {definition}!")
+        patches.engine.set(operand, "ConstantOperand2", DISABLED_LEVEL, definition)
+        self._target = WeakPointer(definition)
+        self._checksum = self._read(definition)
+        return True
+
+    def reset(self):
+        self._target = WeakPointer()
+        self._checksum = None
+
+class ProgressionTracker:
+    """Turns level changes into events and batches AP skill point grants.
+
+    Skill points are only added to the player on flush(), once per tick at most,
+    however many were queued since.
+    """
+    __slots__ = ("level", "pending_points", "_listeners")
+
+    def __init__(self):
+        self.level = 0
+        self.pending_points = 0
+        self._listeners: list[Callable[[int, int], None]] = []
+
+    def on_level_up(self, listener: Callable[[int, int], None]):
+        self._listeners.append(listener)
+        return listener
+
+    def observe_level(self, level: int):
+        if level <= self.level:
+            return
+
+        previous = self.level
+        self.level = level
+        # The first observation after a load is the save's level, not a level up
+        if previous == 0:
+            return
+
+        for listener in self._listeners:
+            listener(previous, level)
+
+    def queue_skill_points(self, amount: int = 1):
+        self.pending_points += amount
+
+    def flush(self) -> int:
+        if not self.pending_points or not get_pc():
+            return 0
+
+        amount = self.pending_points
+        self.pending_points = 0
+        skills.add_skillpoints(amount)
+        logging.info(f"[Archipelago] Granted {amount} skill points")
+        return amount
+
+    def reset(self):
+        """Grants whatever is still pending before the session is dropped; with no player to grant to, it is discarded."""
+        self.flush()
+        if self.pending_points:
+            logging.info(f"[Archipelago] Dropped {self.pending_points} skill points, no player to grant them to")
+        self.pending_points = 0
+        self.level = 0
+
+skill_point_override = SkillPointOverride()
+tracker = ProgressionTracker()
+
+@tracker.on_level_up
+def _log_level_up(previous: int, level: int):
+    logging.info(f"[Archipelago] Player Level Up: {previous} -> {level}")
@@ -1,7 +1,6 @@
 
 from argparse import Namespace
 import os
-from random import choice
 from mods_base import (
     command, 
     get_pc,
@@ -12,38 +11,55 @@ from unrealsdk.hooks import Type #type:ignore
 from unrealsdk.unreal import BoundFunction, UObject, WrappedStruct #type:ignore
 from typing import Any
 
-@command("ap_activate_all_quests", description="Activate all quests for testing purposes")
-def cmd_ap_activate_all_quests(args: Namespace) -> None:
-    logging.info(f"Quest test command received with args: {args}")
+import patches
+import seeding
+import tasks
+
+def iter_activate_all_quests():
     mission_tracker = get_pc().WorldInfo.GRI.MissionTracker
     logging.info(f"Mission Tracker: {mission_tracker}")
 
-    for mission in mission_tracker.MissionList:
+    missions = mission_tracker.MissionList
+    total = len(missions)
+    for i, mission in enumerate(missions):
         if not mission.MissionDef.DlcExpansion:
             logging.info(f"Mission: {mission.MissionDef.MissionName}, State: {mission.Status}")
+            if mission.Status == 0:
+                mission.Status = 1  # Set all missions to completed for testing
+        yield i + 1, total
+
+def mission_entries():
+    """Name resolver builder, registered as "missions" when the mod is enabled."""
+    if get_pc():
+        # Values are MissionList indices, the status lives on the list entry
+        for i, mission in enumerate(get_pc().WorldInfo.GRI.MissionTracker.MissionList):
+            yield mission.MissionDef.MissionName, i
+
+def find_mission(quest_name):
+    import names
+    i = names.get("missions").unique(quest_name)
+    if i is None:
+        return None
+    return get_pc().WorldInfo.GRI.MissionTracker.MissionList[i]
 
-    not_active_missions = [mission for mission in mission_tracker.MissionList if mission.Status == 0]
-    active_missions = [mission for mission in mission_tracker.MissionList if mission.Status == 1]
-    completed_missions = [mission for mission in mission_tracker.MissionList if mission.Status == 4]
-
-    for mission in mission_tracker.MissionList:
-        if not mission.MissionDef.DlcExpansion and mission.Status == 0:
-            mission.Status = 1  # Set all missions to completed for testing
+@command("ap_activate_all_quests", description="Activate all quests for testing purposes")
+def cmd_ap_activate_all_quests(args: Namespace) -> None:
+    logging.info(f"Quest test command received with args: {args}")
+    tasks.submit("activate all quests", iter_activate_all_quests())
 
 @command("ap_set_quest_status", description="Set specific quest status")
 def cmd_ap_set_quest_status(args: Namespace) -> None:
     quest_name = args.quest_name
     new_status = args.new_status
     logging.info(f"Setting quest {quest_name} status to {new_status}.")
-    mission_tracker = get_pc().WorldInfo.GRI.MissionTracker
 
-    for mission in mission_tracker.MissionList:
-        if mission.MissionDef.MissionName == quest_name:
-            mission.Status = new_status
-            logging.info(f"Quest {quest_name} status set to {new_status}.")
-            return
+    mission = find_mission(quest_name)
+    if mission is None:
+        logging.error(f"Quest {quest_name} not found.")
+        return
 
-    logging.error(f"Quest {quest_name} not found.")
+    mission.Status = new_status
+    logging.info(f"Quest {mission.MissionDef.MissionName} status set to {new_status}.")
 cmd_ap_set_quest_status.add_argument("quest_name", help="Name of the quest to set status", type=str)
 cmd_ap_set_quest_status.add_argument("new_status", help="New status for the quest", type=int)
 
@@ -51,27 +67,32 @@ cmd_ap_set_quest_status.add_argument("new_status", help="New status for the ques
 def cmd_ap_activate_quest(args: Namespace) -> None:
     quest_name = args.quest_name
     logging.info(f"Activating quest: {quest_name}")
-    mission_tracker = get_pc().WorldInfo.GRI.MissionTracker
 
-    for mission in mission_tracker.MissionList:
-        if mission.MissionDef.MissionName == quest_name:
-            mission.Status = 1  # Set mission to active
-            logging.info(f"Quest {quest_name} activated.")
-            return
+    mission = find_mission(quest_name)
+    if mission is None:
+        logging.error(f"Quest {quest_name} not found.")
+        return
 
-    logging.error(f"Quest {quest_name} not found.")
+    mission.Status = 1  # Set mission to active
+    logging.info(f"Quest {mission.MissionDef.MissionName} activated.")
 cmd_ap_activate_quest.add_argument("quest_name", help="Name of the quest to activate", type=str)
 
-@command("ap_random_quest", description="Activate a random quest")
-def cmd_ap_random_quest(args: Namespace) -> None:
+def random_quest(rng=None):
     logging.info("Activating a random quest.")
     mission_tracker = get_pc().WorldInfo.GRI.MissionTracker
     not_active_missions = [mission for mission in mission_tracker.MissionList if not mission.MissionDef.DlcExpansion and mission.Status == 0]
 
-    if not_active_missions:
-        choice(not_active_missions).Status = 1
-    else:
+    if not not_active_missions:
         logging.info("No inactive missions available.")
+        return False
+
+    (rng or seeding.get_rng()).choice(not_active_missions).Status = 1
+    return True
+
+@command("ap_random_quest", description="Activate a random quest")
+def cmd_ap_random_quest(args: Namespace) -> None:
+    random_quest(seeding.get_rng(args.location, "quest"))
+cmd_ap_random_quest.add_argument("location", help="Location id to derive the pick from the seed, random if omitted", type=int, nargs="?", default=None)
 
 @command("ap_get_plot_missions", description="Get all plot missions")
 def cmd_ap_get_plot_missions(args: Namespace) -> None:
@@ -83,22 +104,38 @@ def cmd_ap_get_plot_missions(args: Namespace) -> None:
         if mission.MissionDef.bPlotCritical:
             logging.info(f"Plot Mission: {mission.MissionDef.MissionName}, Status: {mission.Status}")
 
-@command("ap_setup_quests", description="Setup quests for Archipelago integration")
-def cmd_ap_setup_quests(args: Namespace) -> None:
-    logging.info("Setting up quests for Archipelago integration.")
-    mission_tracker = get_pc().WorldInfo.GRI.MissionTracker
-    for directors in mission_tracker.MissionDirectors:
-        for directive in directors.MissionDirectives.MissionDirectives:
-            directive.bBeginsMission = False
+def _mission_directives():
+    for directors in get_pc().WorldInfo.GRI.MissionTracker.MissionDirectors:
+        definition = directors.MissionDirectives
+        for directive in definition.MissionDirectives:
+            yield directive, definition
 
-    for mission in mission_tracker.MissionList:
-        mission.MissionDef.MissionGiver = "Archipelago"
-        mission.MissionDef.DialogTalker = None
+def _mission_definitions():
+    for mission in get_pc().WorldInfo.GRI.MissionTracker.MissionList:
+        yield mission.MissionDef
+
+SETUP_QUEST_PATCHES = (
+    patches.PatchSet("directives don't begin missions", _mission_directives, "bBeginsMission", False),
+    patches.PatchSet("missions are given by Archipelago", _mission_definitions, "MissionGiver", "Archipelago"),
+    patches.PatchSet("missions have no dialog talker", _mission_definitions, "DialogTalker", None),
+)
+
+def iter_setup_quests():
+    written = 0
+    for written in patches.engine.apply_iter(SETUP_QUEST_PATCHES):
+        yield
+    logging.info(f"Quest setup changed {written} values.")
 
     for mdd in find_all("MissionDirectivesDefinition"):
         for directive in mdd.MissionDirectives:
             if directive.MissionDefinition:
                 logging.info(f"MDD: {directive.MissionDefinition.MissionName} by {directive.MissionDefinition.MissionGiver} turned in at {directive.MissionDefinition.MissionTurnInLocation}")
+            yield
+
+@command("ap_setup_quests", description="Setup quests for Archipelago integration")
+def cmd_ap_setup_quests(args: Namespace) -> None:
+    logging.info("Setting up quests for Archipelago integration.")
+    tasks.submit("setup quests", iter_setup_quests())
 
 commands = [
     cmd_ap_activate_all_quests,
@@ -0,0 +1,137 @@
+import json
+import os
+from typing import Callable
+from unrealsdk import logging
+
+ITEM_PREFIX = "AP"
+
+class AppliedLedger:
+    """Keys of received items already applied to one save, persisted next to the seed's item files.
+
+    Keys are the received item file names without extension, which the client keeps unique.
+    """
+    __slots__ = ("path", "applied", "_dirty")
+
+    def __init__(self, path: str, applied=()):
+        self.path = path
+        self.applied = set(applied)
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.applied)
+
+    def __contains__(self, key):
+        return key in self.applied
+
+    @classmethod
+    def for_save(cls, seed_path: str, save_id) -> "AppliedLedger":
+        return cls.load(os.path.join(seed_path, f"applied_{save_id}.json"))
+
+    @classmethod
+    def load(cls, path: str) -> "AppliedLedger":
+        try:
+            with open(path, 'r') as f:
+                return cls(path, json.load(f))
+        except OSError:
+            return cls(path)
+        except ValueError as e:
+            logging.info(f"[Archipelago] Could not parse {path}, starting a new ledger: {e}")
+            return cls(path)
+
+    def add(self, key):
+        self.applied.add(key)
+        self._dirty = True
+
+    def save(self) -> bool:
+        if not self._dirty:
+            return True
+
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(sorted(self.applied), f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logging.info(f"[Archipelago] Could not write file: {self.path}")
+            return False
+
+        self._dirty = False
+        return True
+
+def read_item(path: str) -> dict:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except OSError:
+        logging.info(f"[Archipelago] Could not read file: {path}")
+    except ValueError:
+        # The client may still be writing it, picked up on the next poll
+        logging.info(f"[Archipelago] Could not parse file: {path}")
+    return {}
+
+def pending_item_files(seed_path: str, ledger: AppliedLedger, archive=None, skip: Callable[[str], bool] = lambda key: False) -> list[tuple[str, str | None]]:
+    """(key, path) of received items not yet in the ledger, in the client's write order.
+
+    Items already packed into the seed archive have no file and are listed with path None.
+    Keys for which skip(key) is True (e.g. already queued) are left out before anything is read.
+    """
+    pending = []
+    if archive is not None:
+        pending = [(key, None) for key in archive.ids("item") if key not in ledger.applied and not skip(key)]
+    try:
+        with os.scandir(seed_path) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.startswith(ITEM_PREFIX) or not name.endswith(".json"):
+                    continue
+                key = name[:-5]
+                if key in ledger.applied or skip(key) or (archive is not None and ("item", key) in archive):
+                    continue
+                pending.append((key, entry.path))
+    except OSError:
+        pass
+
+    pending.sort(key=lambda p: _order(p[0]))
+    return pending
+
+def _order(key: str):
+    suffix = key[len(ITEM_PREFIX):]
+    return (0, int(suffix), key) if suffix.isdigit() else (1, 0, key)
+
+def reconcile(seed_path: str, ledger: AppliedLedger, apply: Callable[[str, dict], bool], archive=None, skip: Callable[[str], bool] = lambda key: False) -> int:
+    """Apply only received items missing from the ledger. Returns how many were applied.
+
+    apply(key, item) returns False to leave an item for the next pass. Unreadable files are left too.
+    """
+    applied = 0
+    for key, path in pending_item_files(seed_path, ledger, archive, skip):
+        item = archive.get("item", key) if path is None else read_item(path)
+        if not item or not apply(key, item):
+            continue
+        ledger.add(key)
+        applied += 1
+
+    if applied:
+        ledger.save()
+    return applied
+
+def check_file_id(name: str) -> str | None:
+    """The id of a check file name, check<digits>.json, None for anything else (e.g. the ack file)."""
+    if name.startswith("check") and name.endswith(".json") and name[5:-5].isdigit():
+        return name[5:-5]
+    return None
+
+def written_check_ids(seed_path: str, archive=None) -> set:
+    """Ids of check files already written (or archived) for this seed, so a reconnect doesn't rewrite them."""
+    ids = set()
+    if archive is not None:
+        ids.update(int(check_id) if check_id.isdigit() else check_id for check_id in archive.ids("check"))
+    try:
+        with os.scandir(seed_path) as entries:
+            for entry in entries:
+                check_id = check_file_id(entry.name)
+                if check_id is not None:
+                    ids.add(int(check_id))
+    except OSError:
+        pass
+    return ids
@@ -0,0 +1,80 @@
+import json
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+@dataclass(slots=True, frozen=True)
+class Location:
+    """A check location from shared data with its display string and check payload prebuilt."""
+    full_id: int
+    name: str
+    action: str
+    type: str
+    check_name: str
+    # Check file JSON up to the timestamp value
+    payload_prefix: str
+    # Object path of the engine definition behind the check, if shared data has one
+    definition: str = ""
+
+    @classmethod
+    def from_dict(cls, loc: dict) -> "Location":
+        name = sys.intern(loc["name"])
+        action = sys.intern(loc["action"])
+        check_name = f"{action} {name}"
+        payload_prefix = f'{{"type": "check", "id": {json.dumps(loc["full_id"])}, "name": {json.dumps(check_name)}, "timestamp": '
+        return cls(
+            full_id=loc["full_id"],
+            name=name,
+            action=action,
+            type=sys.intern(loc.get("type", "")),
+            check_name=check_name,
+            payload_prefix=payload_prefix,
+            definition=loc.get("definition") or "",
+        )
+
+@dataclass(slots=True, frozen=True)
+class Unlock:
+    id: int
+    name: str
+
+    @classmethod
+    def from_dict(cls, item_id: int, item: dict) -> "Unlock":
+        return cls(id=item_id, name=sys.intern(item["name"]))
+
+class CheckEvent(NamedTuple):
+    location: Location
+    timestamp: float
+
+    @classmethod
+    def now(cls, location: Location) -> "CheckEvent":
+        return cls(location, time.time())
+
+    def payload(self) -> str:
+        return f"{self.location.payload_prefix}{self.timestamp!r}}}"
+
+def locations_by_name(locations) -> dict[str, Location]:
+    """Convert shared data locations (list or name -> dict) into name -> Location."""
+    if isinstance(locations, dict):
+        locations = locations.values()
+    return {loc.name: loc for loc in map(Location.from_dict, locations)}
+
+class UnlockCache:
+    """Unlock records by item id, looked up through the shared data loader once per id."""
+    __slots__ = ("_find", "_by_id")
+
+    def __init__(self, find: Callable[[int], dict | None]):
+        self._find = find
+        self._by_id: dict[int, Unlock | None] = {}
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def get(self, item_id) -> Unlock | None:
+        try:
+            return self._by_id[item_id]
+        except KeyError:
+            item = self._find(item_id)
+            unlock = Unlock.from_dict(item_id, item) if item else None
+            self._by_id[item_id] = unlock
+            return unlock
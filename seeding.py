@@ -0,0 +1,23 @@
+import hashlib
+import random
+
+# AP seed of the connected save, set on connect
+current_seed = ""
+
+def stream(seed, full_id, purpose: str = "") -> random.Random:
+    """Independent PRNG for one location of one seed.
+
+    The same (seed, full_id, purpose) always yields the same sequence, so rewards can be
+    recomputed after a crash or on another machine instead of being stored.
+    """
+    digest = hashlib.sha256(f"{seed}\x00{full_id}\x00{purpose}".encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+def location_stream(full_id, purpose: str = "") -> random.Random:
+    return stream(current_seed, full_id, purpose)
+
+def get_rng(location=None, purpose: str = ""):
+    """Seeded stream for location if given, otherwise the global random module."""
+    if location is None:
+        return random
+    return location_stream(location, purpose)
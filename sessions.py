@@ -0,0 +1,101 @@
+import os
+from collections import OrderedDict
+from typing import Callable
+from unrealsdk import logging
+
+import checks
+import reconcile
+import settings
+
+MAX_SESSIONS = 4
+
+class Session:
+    """Everything bound to one (save id, seed) pair: paths, config, applied ledger, archive and check queue."""
+    __slots__ = ("save_id", "seed", "seed_path", "config_watcher", "ledger", "archive", "check_queue", "unhandled")
+
+    def __init__(self, save_id, seed, seed_path: str):
+        # Sessions only exist once the mod is enabled, compaction stays out of mod discovery
+        import compaction
+        self.save_id = save_id
+        self.seed = seed
+        self.seed_path = seed_path
+        self.config_watcher = settings.ConfigWatcher(os.path.join(seed_path, "config.json"))
+        self.ledger = reconcile.AppliedLedger.for_save(seed_path, save_id)
+        self.archive = compaction.SeedArchive.open(seed_path)
+        self.check_queue = checks.CheckQueue(reconcile.written_check_ids(seed_path, self.archive))
+        # Received item keys that could not be applied, skipped until the next load
+        self.unhandled: set[str] = set()
+
+    @property
+    def config(self) -> settings.Config | None:
+        return self.config_watcher.config
+
+    def __repr__(self):
+        return f"Session(save_id={self.save_id!r}, seed={self.seed!r}, pending={len(self.check_queue)})"
+
+class SessionManager:
+    """Keeps recently used sessions so switching characters doesn't reload anything.
+
+    Sessions are kept in LRU order and the least recently used idle ones are evicted
+    once there are more than max_sessions. Sessions with unwritten checks are skipped,
+    deactivate() writes them out so the session becomes evictable.
+    """
+    __slots__ = ("_sessions", "active", "max_sessions")
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self._sessions: OrderedDict[tuple, Session] = OrderedDict()
+        self.active: Session | None = None
+        self.max_sessions = max_sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def find_seed(self, save_id):
+        """Seed of a cached session for save_id, so reconnecting can skip the bindings file."""
+        for (cached_save_id, seed) in reversed(self._sessions.keys()):
+            if cached_save_id == save_id:
+                return seed
+        return None
+
+    def activate(self, save_id, seed, seed_path: str) -> Session:
+        key = (save_id, seed)
+        session = self._sessions.get(key)
+        if session is None:
+            session = Session(save_id, seed, seed_path)
+            self._sessions[key] = session
+            logging.info(f"[Archipelago] New {session}")
+        else:
+            self._sessions.move_to_end(key)
+
+        self.active = session
+        self._evict()
+        return session
+
+    def deactivate(self, write: Callable[[checks.CheckEvent], bool] | None = None):
+        """Drop the active session, first writing its pending checks with write if given."""
+        session = self.active
+        self.active = None
+        if session is None or write is None or not session.check_queue:
+            return
+        session.check_queue.drain(write)
+        if session.check_queue:
+            logging.info(f"[Archipelago] {len(session.check_queue)} checks of {session} could not be written yet")
+
+    def _evict(self):
+        excess = len(self._sessions) - self.max_sessions
+        if excess <= 0:
+            return
+        # Least recently used first; the order of the sessions that are kept doesn't change
+        for key, session in list(self._sessions.items()):
+            if excess <= 0:
+                break
+            if session is self.active or session.check_queue:
+                # Unwritten checks would be lost, it stays until they are drained
+                continue
+            del self._sessions[key]
+            excess -= 1
+            logging.info(f"[Archipelago] Evicted {session}")
+
+    def clear(self):
+        self._sessions.clear()
+        self.active = None
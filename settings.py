@@ -0,0 +1,123 @@
+import json
+import os
+from unrealsdk import logging
+
+# Every check source the mod can emit. The config enables/disables them by key.
+CHECK_TYPES = ("regions", "bosses", "missions", "pickups", "challenges")
+
+# key -> (type, default). Anything missing or invalid in config.json falls back to the default.
+SCHEMA = {
+    "check_regions": (bool, True),
+    "check_bosses": (bool, True),
+    "check_missions": (bool, True),
+    "check_pickups": (bool, True),
+    "check_challenges": (bool, True),
+    # PlayerTick count between polls of the seed directory
+    "poll_interval": (int, 100),
+    # PlayerTick count between stat() calls on config.json
+    "reload_interval": (int, 300),
+    # Microseconds of mod work per frame, see governor.py
+    "frame_budget_us": (int, 500),
+}
+
+class Config:
+    """Parsed and validated config.json.
+
+    Instances are never mutated after construction; a reload builds a new one and swaps the reference.
+    """
+    __slots__ = (
+        *SCHEMA.keys(),
+        "enabled_checks",
+    )
+
+    def __init__(self, values: dict | None = None):
+        values = values or {}
+
+        for key, (kind, default) in SCHEMA.items():
+            value = values.get(key, default)
+            if not _is_valid(kind, value):
+                logging.info(f"[Archipelago] Invalid config value {key}={value!r}, using default {default!r}")
+                value = default
+            setattr(self, key, value)
+
+        for key in values.keys() - SCHEMA.keys():
+            logging.info(f"[Archipelago] Ignoring unknown config key {key}")
+
+        self.enabled_checks = frozenset(t for t in CHECK_TYPES if getattr(self, f"check_{t}"))
+
+    def __repr__(self):
+        return f"Config({', '.join(f'{k}={getattr(self, k)!r}' for k in SCHEMA)})"
+
+def _is_valid(kind, value) -> bool:
+    if kind is int:
+        # bool is a subclass of int, don't accept it for intervals
+        return isinstance(value, int) and not isinstance(value, bool) and value > 0
+    return isinstance(value, kind)
+
+def parse_config(path: str) -> Config | None:
+    try:
+        with open(path, 'r') as f:
+            values = json.load(f)
+    except OSError:
+        logging.info(f"[Archipelago] Could not read file: {path}")
+        return None
+    except ValueError as e:
+        logging.info(f"[Archipelago] Could not parse {path}: {e}")
+        return None
+
+    if not isinstance(values, dict):
+        logging.info(f"[Archipelago] {path} does not contain an object")
+        return None
+
+    return Config(values)
+
+class ConfigWatcher:
+    """Holds the active Config and hot-reloads it when config.json changes on disk.
+
+    poll() is meant to be called once per PlayerTick; it only stat()s the file every
+    reload_interval ticks and only re-parses when mtime or size changed.
+    """
+    __slots__ = ("path", "config", "_stamp", "_ticks")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.config: Config | None = None
+        self._stamp = None
+        self._ticks = 0
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self) -> bool:
+        stamp = self._stat()
+        if stamp is None:
+            logging.info(f"[Archipelago] Could not read file: {self.path}")
+            return False
+
+        config = parse_config(self.path)
+        self._stamp = stamp
+        if config is None:
+            # keep the last good config, a half written file will change stamp again
+            return False
+
+        self.config = config
+        logging.info(f"[Archipelago] Loaded {config}")
+        return True
+
+    def poll(self) -> bool:
+        """Returns True if a new Config was swapped in."""
+        self._ticks += 1
+        interval = self.config.reload_interval if self.config else SCHEMA["reload_interval"][1]
+        if self._ticks < interval:
+            return False
+        self._ticks = 0
+
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return False
+
+        return self.load()
@@ -1,12 +1,14 @@
 from argparse import Namespace
 import os
-from random import choice
 from mods_base import (
     command, 
     get_pc,
 )
 from unrealsdk import logging, make_struct
 
+import paths
+import seeding
+
 def add_skillpoints(amount):
     if get_pc():
         get_pc().PlayerReplicationInfo.GeneralSkillPoints += amount
@@ -24,22 +26,21 @@ def export_skills():
     import json
     if get_pc():
         skills = get_pc().PlayerSkillTree.Skills
-        # Convert skills to a serializable format if needed
         skill_list = []
         for skill in skills:
-            # Try to get a dict representation, fallback to str
-            if hasattr(skill, '__dict__'):
-                skill_list.append(skill.__dict__)
-            else:
-                skill_list.append(str(skill))
-        with open(os.path.join(os.path.expandvars(r"%localappdata%/BL2Archipelago"), "ap_skills.json"), "w") as f:
+            skill_list.append({
+                "path": skill.Definition._path_name(),
+                "name": skill.Definition.SkillName,
+                "max_grade": skill.Definition.MaxGrade,
+            })
+        with open(os.path.join(paths.get_game_communication_path(), "ap_skills.json"), "w") as f:
             json.dump(skill_list, f, indent=2)
 
 def reset_skilltree():
     if get_pc():
         get_pc().ResetSkillTree(True)
 
-def random_skill():
+def random_skill(rng=None):
     if get_pc():
         locked_skills = []
         for skill in get_pc().PlayerSkillTree.Skills:
@@ -48,20 +49,26 @@ def random_skill():
                 locked_skills.append(skill)
         if not locked_skills:
             logging.info("All skills are already unlocked.")
-            return
+            return False
 
-        skill = choice(locked_skills)
+        skill = (rng or seeding.get_rng()).choice(locked_skills)
         logging.info(f"Randomly selected skill: {skill.Definition}")
         get_pc().PlayerSkillTree.SetSkillGrade(skill.Definition, 99)
+        return True
+    return False
+
+def skill_entries():
+    """Name resolver builder, registered as "skills" when the mod is enabled."""
+    if get_pc():
+        for skill in get_pc().PlayerSkillTree.Skills:
+            yield skill.Definition.SkillName, skill.Definition
 
 def set_skill(skill_name, grade):
     if get_pc():
         logging.info(f"Setting skill {skill_name} to grade {grade}")
-        skilldef = None
-        for skill in get_pc().PlayerSkillTree.Skills:
-            if skill.Definition.SkillName == skill_name:
-                skilldef = skill.Definition
-                break
+        # Loaded with the other deferred modules in on_enable
+        import names
+        skilldef = names.get("skills").unique(skill_name)
         if not skilldef:
             logging.error(f"Skill {skill_name} not found!")
             return
@@ -94,7 +101,8 @@ def cmd_ap_unlock_all_skills(args: Namespace) -> None:
 
 @command("ap_random_skill", description="Set random skill from tree")
 def cmd_ap_random_skill(args: Namespace) -> None:
-    random_skill()
+    random_skill(seeding.get_rng(args.location, "skill"))
+cmd_ap_random_skill.add_argument("location", help="Location id to derive the pick from the seed, random if omitted", type=int, nargs="?", default=None)
 
 @command("ap_reset_skilltree", description="Set skillpoints to x amount")
 def cmd_ap_reset_skilltree(args: Namespace) -> None:
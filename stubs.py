@@ -0,0 +1,22 @@
+from argparse import Namespace
+import importlib
+import shlex
+from mods_base import command
+
+def command_stub(module: str, attribute: str, name: str, description: str):
+    """Console command that imports its module on first use and runs the real command with the same arguments.
+
+    Registering the stub instead of the real command keeps the module out of mod discovery.
+    """
+    # "--" keeps options like --count away from the stub's parser, the real one parses them
+    @command(name, splitter=lambda line: ["--", *shlex.split(line)], description=description)
+    def stub(args: Namespace) -> None:
+        real = getattr(importlib.import_module(module), attribute)
+        try:
+            parsed = real.parser.parse_args(args.argv)
+        except SystemExit:
+            # argparse already printed the usage or the error
+            return
+        real.callback(parsed)
+    stub.add_argument("argv", help=f"Arguments of the real command, {name} -h lists them", nargs="*")
+    return stub
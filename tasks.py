@@ -0,0 +1,112 @@
+from argparse import Namespace
+import time
+from typing import Generator
+from mods_base import command
+from unrealsdk import logging
+
+# Seconds of work per tick across all tasks
+TICK_BUDGET = 0.002
+
+class Task:
+    """A generator doing one step of work per yield. It may yield (done, total) to report progress."""
+    __slots__ = ("name", "_steps", "steps", "done", "total", "frames", "started")
+
+    def __init__(self, name: str, steps: Generator, total: int | None = None):
+        self.name = name
+        self._steps = steps
+        self.steps = 0
+        self.done = 0
+        self.total = total
+        self.frames = 0
+        self.started = time.perf_counter()
+
+    def step(self) -> bool:
+        """Run one step, returns False once the generator is exhausted."""
+        try:
+            progress = next(self._steps)
+        except StopIteration:
+            return False
+
+        self.steps += 1
+        if progress is None:
+            self.done += 1
+        else:
+            self.done, self.total = progress
+        return True
+
+    def close(self):
+        self._steps.close()
+
+    def __repr__(self):
+        total = f"/{self.total}" if self.total else ""
+        return f"Task({self.name}: {self.done}{total} after {self.frames} frames)"
+
+class TaskRunner:
+    """Runs long engine walks a slice at a time from PlayerTick so they never spike a single frame."""
+    __slots__ = ("_tasks", "budget")
+
+    def __init__(self, budget: float = TICK_BUDGET):
+        self._tasks: list[Task] = []
+        self.budget = budget
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __iter__(self):
+        return iter(self._tasks)
+
+    def submit(self, name: str, steps: Generator, total: int | None = None) -> Task:
+        task = Task(name, steps, total)
+        self._tasks.append(task)
+        logging.info(f"[Archipelago] Started {task.name}")
+        return task
+
+    def run(self, budget: float | None = None) -> float:
+        """Step tasks in submission order until the budget is spent. Returns the time used."""
+        if not self._tasks:
+            return 0.0
+
+        start = time.perf_counter()
+        deadline = start + (self.budget if budget is None else budget)
+        while self._tasks:
+            task = self._tasks[0]
+            task.frames += 1
+            try:
+                while task.step():
+                    if time.perf_counter() >= deadline:
+                        return time.perf_counter() - start
+            except Exception as e:
+                logging.error(f"[Archipelago] {task.name} failed: {e}")
+            else:
+                logging.info(f"[Archipelago] Finished {task} in {time.perf_counter() - task.started:.2f} s")
+            self._tasks.pop(0)
+
+        return time.perf_counter() - start
+
+    def cancel_all(self):
+        for task in self._tasks:
+            task.close()
+            logging.info(f"[Archipelago] Cancelled {task}")
+        self._tasks.clear()
+
+runner = TaskRunner()
+
+def submit(name: str, steps: Generator, total: int | None = None) -> Task:
+    return runner.submit(name, steps, total)
+
+@command("ap_tasks", description="Show running background tasks")
+def cmd_ap_tasks(args: Namespace) -> None:
+    if not runner:
+        logging.info("[Archipelago] No running tasks")
+        return
+    for task in runner:
+        logging.info(f"[Archipelago] {task}")
+
+@command("ap_cancel_tasks", description="Cancel all running background tasks")
+def cmd_ap_cancel_tasks(args: Namespace) -> None:
+    runner.cancel_all()
+
+commands = [
+    cmd_ap_tasks,
+    cmd_ap_cancel_tasks,
+]
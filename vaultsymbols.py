@@ -9,10 +9,38 @@ from unrealsdk.hooks import Type #type:ignore
 from unrealsdk.unreal import BoundFunction, UObject, WrappedStruct #type:ignore
 from typing import Any
 
+import checks
+import coop
+
+enabled = True
+index = checks.LocationIndex({}, lambda challenge: challenge.ChallengeName)
+# Challenges already handled this session. Reloads and co-op replication fire the behavior again.
+discovered = set()
+
+def reset():
+    global enabled
+    discovered.clear()
+    # Until a config says otherwise; co-op clients never load one and leave filtering to the host
+    enabled = True
+
 @hook("WillowGame.Behavior_DiscoverLevelChallengeObject:ApplyBehaviorToContext")
 def DiscoverLevelChallengeObject(obj: UObject, args: WrappedStruct, ret: Any, func: BoundFunction) -> Any:
-    logging.info(f"[Archipelago] Discover Level Challenge Object: {args.SelfObject.AssociatedChallenge.ChallengeName}\n{args.SelfObject.AssociatedChallenge.AssociatedMap}\n{args.SelfObject.AssociatedChallenge.ChallengeType}\n{args.SelfObject.AssociatedChallenge.Levels}")
+    challenge = args.SelfObject.AssociatedChallenge
+    if challenge in discovered:
+        return
+
+    discovered.add(challenge)
+
+    if not enabled:
+        return
+
+    check = index.get(challenge)
+    if check is None:
+        return
+
+    logging.info(f"[Archipelago] Discovered {check.check_name}")
+    coop.send_check(check)
 
 hooks = [
     DiscoverLevelChallengeObject,
-]
\ No newline at end of file
+]
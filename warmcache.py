@@ -0,0 +1,96 @@
+import hashlib
+import os
+import pickle
+import sys
+import time
+import tomllib
+from typing import Callable
+from unrealsdk import logging
+
+from records import Location
+
+MOD_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARED_DIR = os.path.join(MOD_DIR, "shared")
+CACHE_PATH = os.path.join(MOD_DIR, "index_cache.bin")
+
+MAGIC = b"APIX"
+# Bump when the layout of the cached tables or of Location changes
+FORMAT_VERSION = 1
+FIELDS = tuple(Location.__dataclass_fields__)
+
+def _mod_version() -> str:
+    try:
+        with open(os.path.join(MOD_DIR, "pyproject.toml"), 'rb') as f:
+            return tomllib.load(f)["project"]["version"]
+    except (OSError, ValueError, KeyError):
+        return ""
+
+def source_hash() -> bytes:
+    """SHA-256 over the shared data files, the mod version, the cache format and the Python version."""
+    digest = hashlib.sha256(f"{FORMAT_VERSION}:{_mod_version()}:{sys.version_info[:2]}:{FIELDS}".encode())
+    for root, dirs, files in os.walk(SHARED_DIR):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, SHARED_DIR).encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.digest()
+
+def _pack(tables: dict[str, dict[str, Location]]) -> dict[str, list[tuple]]:
+    return {name: [tuple(getattr(loc, field) for field in FIELDS) for loc in table.values()] for name, table in tables.items()}
+
+def _unpack(packed: dict[str, list[tuple]]) -> dict[str, dict[str, Location]]:
+    tables = {}
+    for name, rows in packed.items():
+        table = {}
+        for row in rows:
+            loc = Location(*row)
+            table[loc.name] = loc
+        tables[name] = table
+    return tables
+
+def load(key: bytes, path: str = CACHE_PATH) -> dict[str, dict[str, Location]] | None:
+    """Tables from the cache file if it was written for key, None otherwise."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    header = len(MAGIC) + len(key)
+    if data[:len(MAGIC)] != MAGIC or data[len(MAGIC):header] != key:
+        return None
+    try:
+        return _unpack(pickle.loads(memoryview(data)[header:]))
+    except Exception as e:
+        logging.info(f"[Archipelago] Could not read {path}, rebuilding: {e}")
+        return None
+
+def save(key: bytes, tables: dict[str, dict[str, Location]], path: str = CACHE_PATH) -> bool:
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(key)
+            pickle.dump(_pack(tables), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # e.g. the mod is installed somewhere read-only, it is simply rebuilt next time
+        logging.info(f"[Archipelago] Could not write {path}: {e}")
+        return False
+    return True
+
+def load_or_build(build: Callable[[], dict[str, dict[str, Location]]], path: str = CACHE_PATH) -> dict[str, dict[str, Location]]:
+    """Derived location tables, read from the warm cache or built and cached if the shared data changed."""
+    start = time.perf_counter()
+    key = source_hash()
+    tables = load(key, path)
+    if tables is not None:
+        logging.info(f"[Archipelago] Loaded indexes from {os.path.basename(path)} in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return tables
+
+    tables = build()
+    save(key, tables, path)
+    logging.info(f"[Archipelago] Built indexes in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return tables
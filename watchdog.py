@@ -0,0 +1,208 @@
+from argparse import Namespace
+import os
+import time
+import tracemalloc
+from typing import Callable, Iterator
+from mods_base import command
+from unrealsdk import logging, find_all
+
+import checks
+import fasttravels
+import items
+import notifications
+import patches
+import paths
+import tasks
+import vaultsymbols
+
+REPORT_FILE = "ap_watchdog.log"
+# Frames kept per tracemalloc allocation, enough to tell which mod function allocated
+TRACE_FRAMES = 4
+TOP_ALLOCATIONS = 10
+
+# Mod-owned container name -> size getter
+containers: dict[str, Callable[[], int]] = {
+    "fasttravels.locationDisplayNames": lambda: len(fasttravels.locationDisplayNames),
+    "fasttravels.locationStationDefinitions": lambda: len(fasttravels.locationStationDefinitions),
+    "checks.queue": lambda: len(checks.queue),
+    "notifications.queue": lambda: len(notifications.queue),
+    "vaultsymbols.discovered": lambda: len(vaultsymbols.discovered),
+    "vaultsymbols.index cache": lambda: vaultsymbols.index.cache_size,
+    "patches.engine journal": lambda: len(patches.engine),
+    "tasks.runner": lambda: len(tasks.runner),
+    "items rolled but not destroyed": lambda: items.pool_roll_stats["rolled"] - items.pool_roll_stats["destroyed"],
+}
+
+# UObject class -> name prefix of the instances the mod constructs. Rolled inventory isn't
+# named by the mod, it is tracked by the "items rolled but not destroyed" counter instead.
+constructed_objects: dict[str, str] = {
+    "Behavior_SpawnLootAroundPoint": "LootSpawner_",
+    "ItemPoolDefinition": "ArchipelagoPool_",
+}
+
+def watch(name: str, size: Callable[[], int]):
+    containers[name] = size
+
+def _count_objects(cls: str, prefix: str) -> int:
+    # One synchronous pass: a find_all iteration must not be paused across frames, objects can
+    # be collected in between, and no object may outlive the call
+    try:
+        return sum(1 for obj in find_all(cls, exact=False) if obj.Name.startswith(prefix))
+    except Exception:
+        return -1
+
+def _iter_count_objects(counts: dict[str, int]) -> Iterator[None]:
+    # Yields between classes only, each class is counted within one frame
+    for cls, prefix in constructed_objects.items():
+        counts[cls] = _count_objects(cls, prefix)
+        yield
+
+def _measure_containers() -> dict[str, int]:
+    sizes = {}
+    for name, size in containers.items():
+        try:
+            sizes[name] = size()
+        except Exception:
+            sizes[name] = -1
+    return sizes
+
+class Snapshot:
+    """Filled in by iter_take() one step at a time, or all at once by take()."""
+    __slots__ = ("taken", "containers", "objects", "memory")
+
+    def __init__(self):
+        self.taken = time.time()
+        self.containers: dict[str, int] = {}
+        self.objects: dict[str, int] = {}
+        self.memory = None
+
+    @classmethod
+    def take(cls) -> "Snapshot":
+        snapshot = cls()
+        for _ in snapshot.iter_take():
+            pass
+        return snapshot
+
+    def iter_take(self) -> Iterator[None]:
+        self.containers = _measure_containers()
+        yield
+        yield from _iter_count_objects(self.objects)
+        if tracemalloc.is_tracing():
+            self.memory = tracemalloc.take_snapshot()
+
+    def traced_bytes(self) -> int:
+        if self.memory is None:
+            return 0
+        return sum(stat.size for stat in self.memory.statistics("filename"))
+
+def _diff_counts(label: str, before: dict[str, int], after: dict[str, int]) -> list[str]:
+    lines = [f"{label}:"]
+    for name, value in after.items():
+        delta = value - before.get(name, 0)
+        lines.append(f"  {name}: {value} ({delta:+d})")
+    return lines
+
+def diff(before: Snapshot, after: Snapshot) -> list[str]:
+    hours = (after.taken - before.taken) / 3600
+    lines = [f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(after.taken))}] {hours:.2f} h since baseline"]
+    lines += _diff_counts("Containers", before.containers, after.containers)
+    lines += _diff_counts("Objects", before.objects, after.objects)
+
+    if before.memory is not None and after.memory is not None:
+        traced = after.traced_bytes()
+        lines.append(f"Python memory: {traced / 1024:.0f} KiB ({(traced - before.traced_bytes()) / 1024:+.0f} KiB)")
+        for stat in after.memory.compare_to(before.memory, "traceback")[:TOP_ALLOCATIONS]:
+            frame = stat.traceback[0]
+            lines.append(f"  {frame.filename}:{frame.lineno}: {stat.size / 1024:.1f} KiB ({stat.size_diff / 1024:+.1f} KiB, {stat.count_diff:+d} blocks)")
+    return lines
+
+class Watchdog:
+    """Snapshots mod memory and diffs every snapshot against the first one.
+
+    While running, poll() takes a snapshot every interval seconds and appends the diff to
+    the report, so a long session leaves a record of anything that keeps growing. Those
+    snapshots run as a task, sliced across frames; the manual ones are taken at once.
+    """
+    __slots__ = ("baseline", "last", "interval", "_next", "_task")
+
+    def __init__(self):
+        self.baseline: Snapshot | None = None
+        self.last: Snapshot | None = None
+        self.interval = 0.0
+        self._next = 0.0
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self.baseline is not None
+
+    def start(self, interval: float = 0.0):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        self.baseline = self.last = Snapshot.take()
+        self.interval = interval
+        self._next = time.monotonic() + interval
+
+    def stop(self):
+        self.baseline = self.last = None
+        self.interval = 0.0
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def snapshot(self) -> list[str]:
+        if self.baseline is None:
+            self.start()
+        self.last = Snapshot.take()
+        lines = diff(self.baseline, self.last)
+        self._write(lines)
+        return lines
+
+    def iter_snapshot(self) -> Iterator[None]:
+        snapshot = Snapshot()
+        yield from snapshot.iter_take()
+        yield
+        # Stopped while the snapshot was being taken
+        if self.baseline is None:
+            return
+        self.last = snapshot
+        self._write(diff(self.baseline, snapshot))
+
+    def poll(self, now: float | None = None):
+        if not self.interval or self.baseline is None:
+            return
+        now = time.monotonic() if now is None else now
+        if now < self._next:
+            return
+        self._next = now + self.interval
+        if self._task is not None and self._task in tasks.runner:
+            return
+        self._task = tasks.submit("watchdog snapshot", self.iter_snapshot())
+
+    def _write(self, lines: list[str]):
+        path = os.path.join(paths.get_game_communication_path(), REPORT_FILE)
+        try:
+            with open(path, "a") as f:
+                f.write("\n".join(lines) + "\n\n")
+        except OSError as e:
+            logging.info(f"[Archipelago] Could not write watchdog report: {e}")
+
+watchdog = Watchdog()
+
+@command("ap_watchdog", description="Snapshot mod memory and diff it against the baseline")
+def cmd_ap_watchdog(args: Namespace) -> None:
+    match args.action:
+        case "start":
+            watchdog.start(args.interval * 60)
+            logging.info(f"[Archipelago] Watchdog baseline taken, writing to {REPORT_FILE}")
+        case "stop":
+            watchdog.stop()
+            logging.info("[Archipelago] Watchdog stopped")
+        case _:
+            for line in watchdog.snapshot():
+                logging.info(f"[Archipelago] {line}")
+cmd_ap_watchdog.add_argument("action", choices=["start", "snapshot", "stop"], nargs="?", default="snapshot")
+cmd_ap_watchdog.add_argument("--interval", help="Minutes between automatic snapshots, 0 for manual only", type=float, default=0)
+
+commands = [
+    cmd_ap_watchdog,
+]